@@ -0,0 +1,212 @@
+import copy
+import json
+import sys
+from typing import Dict, List
+
+import numpy as np
+
+from testing import (CIPHER_CLASSES, Cipher, NumpyRandomSource, _codepoints_text, _string_codes,
+                     levenshtein_myers, read_corpus)
+
+# Upper bound on variants * length encrypted and compared at once
+BLOCK_ELEMENTS = 1 << 22
+HISTOGRAM_BINS = 10
+
+
+def perturb(original_string: str, positions: np.ndarray, bit: int = 0) -> np.ndarray:
+    """
+    Builds the perturbed variants of a string, one per position, by flipping one bit
+    of the character's codepoint.
+
+    Parameters:
+        original_string (str): The string to perturb.
+        positions (np.ndarray): The character positions to perturb.
+        bit (int): The codepoint bit to flip.
+
+    Returns:
+        np.ndarray: A (positions, length) matrix of codepoints, one variant per row.
+    """
+    codes = _string_codes(original_string).astype(np.int64)
+    variants = np.tile(codes, (len(positions), 1))
+    rows = np.arange(len(positions))
+    variants[rows, positions] ^= 1 << bit
+    flipped = variants[rows, positions]
+    if ((flipped > sys.maxunicode) | ((flipped >= 0xD800) & (flipped <= 0xDFFF))).any():
+        raise ValueError(f"Flipping bit {bit} leaves the valid codepoint range")
+    return variants
+
+
+def _rows_to_strings(rows: np.ndarray) -> List[str]:
+    """
+    Converts a codepoint matrix into one string per row.
+
+    Parameters:
+        rows (np.ndarray): The codepoint matrix.
+
+    Returns:
+        List[str]: The strings.
+    """
+    text = _codepoints_text(rows)
+    width = rows.shape[1]
+    return [text[i * width:(i + 1) * width] for i in range(rows.shape[0])]
+
+
+def encrypt_variants(cipher: Cipher, strings: List[str], seed: int) -> List[str]:
+    """
+    Encrypts the base string and its variants under the same randomness (shift and
+    noise, or key and nonce), so the differences come from the perturbation alone.
+
+    Parameters:
+        cipher (Cipher): A cipher of the kind to analyze; it is copied, never modified.
+        strings (List[str]): The base string followed by its variants.
+        seed (int): The seed of the shared randomness.
+
+    Returns:
+        List[str]: The encrypted strings, in the same order.
+    """
+    if type(cipher) is Cipher:
+        return Cipher.encrypt_many(strings, NumpyRandomSource(seed), shared_randomness=True)
+    encrypted = []
+    for original_string in strings:
+        variant = copy.copy(cipher)
+        variant.original_string = original_string
+        variant.random_source = NumpyRandomSource(seed)
+        variant.encrypt()
+        encrypted.append(variant.encrypted_string)
+    return encrypted
+
+
+def _diffusion(base: str, encrypted: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Compares every variant ciphertext with the base ciphertext.
+
+    Parameters:
+        base (str): The ciphertext of the unperturbed string.
+        encrypted (List[str]): The ciphertexts of the variants.
+
+    Returns:
+        Dict[str, np.ndarray]: Per variant, the fraction of ciphertext characters that
+        changed, the fraction of codepoint bits that flipped and the span from the first
+        to the last changed character as a fraction of the length.
+    """
+    if any(len(e) != len(base) for e in encrypted):
+        # Lengths differ, so characters cannot be compared in place
+        distances = np.array([levenshtein_myers(base, e) for e in encrypted], dtype=float)
+        lengths = np.array([max(len(base), len(e)) for e in encrypted], dtype=float)
+        nan = np.full(len(encrypted), np.nan)
+        return {"changed_fraction": distances / lengths, "bit_flip_ratio": nan, "spread": nan}
+
+    base_codes = _string_codes(base).astype(np.int64)
+    codes = _string_codes("".join(encrypted)).astype(np.int64).reshape(len(encrypted), len(base))
+    changed = codes != base_codes
+    counts = changed.sum(axis=1)
+    flipped = np.bitwise_xor(codes, base_codes)
+    bits = max(int(base_codes.max()).bit_length(), int(codes.max()).bit_length(), 1)
+    if hasattr(np, "bitwise_count"):
+        bit_counts = np.bitwise_count(flipped).sum(axis=1)
+    else:
+        bit_counts = sum(((flipped >> b) & 1).sum(axis=1) for b in range(bits))
+    first = np.argmax(changed, axis=1)
+    last = len(base) - 1 - np.argmax(changed[:, ::-1], axis=1)
+    spread = np.where(counts > 0, (last - first + 1) / len(base), 0.0)
+    return {"changed_fraction": counts / len(base), "bit_flip_ratio": bit_counts / (bits * len(base)),
+            "spread": spread}
+
+
+def analyze(original_string: str, cipher_name: str = "Cipher", samples: int = None, bit: int = 0,
+            seed: int = 0) -> Dict[str, object]:
+    """
+    Runs an avalanche analysis: every position (or a random sample of them) is
+    perturbed by one bit flip, all the variants are encrypted in batches under the
+    same randomness as the unperturbed string, and the diffusion of each
+    perturbation is measured as arrays, without one cipher object and one quadratic
+    Levenshtein distance per variant.
+
+    Parameters:
+        original_string (str): The string to analyze.
+        cipher_name (str): The cipher class to use, a key of CIPHER_CLASSES.
+        samples (int): The number of positions to perturb; None perturbs every position.
+        bit (int): The codepoint bit to flip.
+        seed (int): The seed of the shared randomness and of the position sample.
+
+    Returns:
+        Dict[str, object]: The perturbed positions and, per position, changed_fraction,
+        bit_flip_ratio and spread (see _diffusion()), plus their summary().
+    """
+    if not original_string:
+        raise ValueError("Cannot analyze an empty string")
+    length = len(original_string)
+    if samples is None or samples >= length:
+        positions = np.arange(length)
+    else:
+        positions = np.sort(np.random.default_rng(seed).choice(length, size=samples, replace=False))
+
+    cipher = CIPHER_CLASSES[cipher_name](original_string)
+    block = max(1, BLOCK_ELEMENTS // length)
+    parts: Dict[str, List[np.ndarray]] = {"changed_fraction": [], "bit_flip_ratio": [], "spread": []}
+    for start in range(0, len(positions), block):
+        variants = _rows_to_strings(perturb(original_string, positions[start:start + block], bit))
+        # The base string is encrypted in every block so it shares the block's randomness
+        encrypted = encrypt_variants(cipher, [original_string] + variants, seed)
+        for name, values in _diffusion(encrypted[0], encrypted[1:]).items():
+            parts[name].append(values)
+
+    report = {"positions": positions, **{name: np.concatenate(values) for name, values in parts.items()}}
+    report["summary"] = summary(report)
+    return report
+
+
+def summary(report: Dict[str, object]) -> Dict[str, object]:
+    """
+    Summarizes an avalanche report. An ideal cipher changes about half the bits and
+    nearly every character for any single-bit perturbation.
+
+    Parameters:
+        report (Dict[str, object]): The result of analyze().
+
+    Returns:
+        Dict[str, object]: The number of perturbations, the mean, standard deviation, minimum
+        and maximum of each statistic, a histogram of changed_fraction over [0, 1], and the
+        position with the least diffusion (the worst case).
+    """
+    changed = report["changed_fraction"]
+    result: Dict[str, object] = {"perturbations": int(len(changed))}
+    for name in ("changed_fraction", "bit_flip_ratio", "spread"):
+        values = report[name]
+        if np.isnan(values).all():
+            continue
+        result[name] = {"mean": float(np.nanmean(values)), "std": float(np.nanstd(values)),
+                        "min": float(np.nanmin(values)), "max": float(np.nanmax(values))}
+    counts, _ = np.histogram(changed, bins=HISTOGRAM_BINS, range=(0.0, 1.0))
+    result["changed_fraction_histogram"] = counts.tolist()
+    worst = int(np.argmin(changed))
+    result["worst_case"] = {"position": int(report["positions"][worst]), "changed_fraction": float(changed[worst])}
+    return result
+
+
+def main(argv: List[str] = None) -> None:
+    """
+    Runs the avalanche analysis on every record of a corpus and prints the summaries.
+
+    Parameters:
+        argv (List[str]): The command-line arguments. Defaults to sys.argv[1:].
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure how single-bit input changes diffuse through a cipher.")
+    parser.add_argument("corpus", help="corpus file: one record per line, or .jsonl")
+    parser.add_argument("--cipher", choices=sorted(CIPHER_CLASSES), default="Cipher")
+    parser.add_argument("--samples", type=int, help="positions to perturb per record (default: all)")
+    parser.add_argument("--bit", type=int, default=0, help="codepoint bit to flip")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the shared randomness")
+    args = parser.parse_args(argv)
+
+    for index, original_string in enumerate(read_corpus(args.corpus), start=1):
+        if not original_string:
+            continue
+        report = analyze(original_string, args.cipher, args.samples, args.bit, args.seed)
+        print(json.dumps({"index": index, "length": len(original_string), **report["summary"]}))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
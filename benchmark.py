@@ -0,0 +1,284 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from typing import Dict, List
+
+import numpy as np
+from prettytable import PrettyTable
+
+from testing import (CIPHER_CLASSES, AESCipher, Cipher, RandomSource, Scoring, levenshtein_banded, levenshtein_dp,
+                     levenshtein_myers, levenshtein_sampled, make_random_source, measure)
+
+# Larger sizes can be passed with --sizes; the default run stays well inside memory
+DEFAULT_SIZES = [10, 1_000, 100_000, 10_000_000]
+# Importing the core and encrypting must not pull these in
+HEAVY_MODULES = ["numpy", "scipy", "prettytable"]
+IMPORT_SNIPPET = (
+    "import sys, testing; testing.Cipher('import check').encrypt(); "
+    f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+)
+# Every metric gets the same weight; the benchmark only cares about timing
+BENCHMARK_WEIGHTS = {name: 1.0 for name in Scoring.METRIC_NAMES}
+
+
+def random_text(size: int, random_source: RandomSource = None) -> str:
+    """
+    Generates a random printable ASCII string, with NumPy unless the source is seeded.
+
+    Parameters:
+        size (int): The length of the string.
+        random_source (RandomSource): Optional source; a seeded one makes the inputs reproducible.
+
+    Returns:
+        str: The random string.
+    """
+    if random_source is not None and random_source.seed is not None:
+        return random_source.characters(ord(" "), ord("~"), size)
+    codes = np.random.randint(ord(" "), ord("~") + 1, size=size, dtype=np.uint8)
+    return codes.tobytes().decode("ascii")
+
+
+def benchmark_ciphers(sizes: List[int], cipher_names: List[str], warmup: int, trials: int,
+                      budget: float, random_source: RandomSource = None) -> List[Dict]:
+    """
+    Times encrypt() and decrypt() for each cipher class and input size, after checking
+    AESCipher against the FIPS-197 test vectors.
+
+    Parameters:
+        sizes (List[int]): The plaintext sizes in bytes.
+        cipher_names (List[str]): The cipher classes to benchmark, keys of CIPHER_CLASSES.
+        warmup (int): The number of warm-up runs.
+        trials (int): The maximum number of timed runs.
+        budget (float): The time budget in seconds for each measurement.
+        random_source (RandomSource): Optional source for the inputs and the ciphers.
+
+    Returns:
+        List[Dict]: One result per benchmark and size.
+    """
+    # Timing a wrong block cipher is pointless; CTR mode would still round-trip
+    if "AESCipher" in cipher_names:
+        assert AESCipher.self_test(), "AESCipher fails the FIPS-197 test vectors"
+    results = []
+    for size in sizes:
+        plaintext = random_text(size, random_source)
+        for name in cipher_names:
+            cipher = CIPHER_CLASSES[name](plaintext, random_source=random_source)
+            encrypt = measure(cipher.encrypt, warmup, trials, size=size, budget_seconds=budget)
+            decrypt = measure(cipher.decrypt, warmup, trials, size=size, budget_seconds=budget)
+            results.append({"benchmark": f"{name}.encrypt", "size": size, **encrypt})
+            results.append({"benchmark": f"{name}.decrypt", "size": size, **decrypt})
+    return results
+
+
+def benchmark_metrics(sizes: List[int], warmup: int, trials: int, budget: float,
+                      random_source: RandomSource = None) -> List[Dict]:
+    """
+    Times every Scoring metric, including the intermediate results it needs, for
+    each input size.
+
+    Parameters:
+        sizes (List[int]): The plaintext sizes in bytes.
+        warmup (int): The number of warm-up runs.
+        trials (int): The maximum number of timed runs.
+        budget (float): The time budget in seconds for each measurement.
+        random_source (RandomSource): Optional source for the inputs, the cipher and the metrics.
+
+    Returns:
+        List[Dict]: One result per metric and size.
+    """
+    results = []
+    for size in sizes:
+        cipher = Cipher(random_text(size, random_source), random_source)
+        cipher.encrypt()
+        scoring = Scoring(cipher, 0.0, BENCHMARK_WEIGHTS, random_source=random_source)
+        for name in Scoring.METRIC_NAMES:
+            timing = measure(getattr(scoring, f"{name}_metric"), warmup, trials, setup=scoring.clear_cache,
+                             size=size, budget_seconds=budget)
+            results.append({"benchmark": f"Scoring.{name}", "size": size, **timing})
+    return results
+
+
+def benchmark_levenshtein(sizes: List[int], dp_limit: int, band: int, trials: int,
+                          random_source: RandomSource = None) -> List[Dict]:
+    """
+    Compares the Levenshtein backends on the string pairs the Scoring metrics produce:
+    two encryptions of plaintexts that differ in the first character
+    (change_propagation) and a plaintext against its own decryption
+    (normalized_levenshtein). The sampled estimate must bracket the exact distance.
+
+    Parameters:
+        sizes (List[int]): The plaintext lengths to test.
+        dp_limit (int): The largest plaintext length for which the quadratic DP is run.
+        band (int): The distance cap used for the banded backend.
+        trials (int): The maximum number of timed runs.
+        random_source (RandomSource): Optional source for the plaintexts and the ciphers.
+
+    Returns:
+        List[Dict]: One result per backend, case and size.
+    """
+    results = []
+    for size in sizes:
+        plaintext = random_text(size, random_source)
+        cipher_a = Cipher(plaintext, random_source)
+        cipher_a.encrypt()
+        cipher_b = Cipher('a' + plaintext[1:], random_source)
+        cipher_b.encrypt()
+        cases = [
+            ("change_propagation", cipher_a.encrypted_string, cipher_b.encrypted_string),
+            ("identical", plaintext, cipher_a.decrypt()),
+        ]
+        for case, s1, s2 in cases:
+            backends = {
+                "myers": lambda: levenshtein_myers(s1, s2),
+                f"banded_k{band}": lambda: levenshtein_banded(s1, s2, band),
+            }
+            if size <= dp_limit:
+                assert levenshtein_dp(s1, s2) == levenshtein_myers(s1, s2), "Backends disagree"
+                backends["dp"] = lambda: levenshtein_dp(s1, s2)
+            _, low, high = levenshtein_sampled(s1, s2)
+            assert low <= levenshtein_myers(s1, s2) <= high, "Sampled interval misses the exact distance"
+            backends["sampled"] = lambda: levenshtein_sampled(s1, s2)
+            for backend, func in backends.items():
+                timing = measure(func, warmup=0, trials=trials, size=size)
+                results.append({"benchmark": f"levenshtein.{backend}.{case}", "size": size, **timing})
+    return results
+
+
+def benchmark_import(warmup: int, trials: int) -> List[Dict]:
+    """
+    Times a fresh interpreter that imports testing and encrypts one string, next to a
+    bare interpreter start for reference, and records which heavy modules got loaded.
+
+    Parameters:
+        warmup (int): The number of warm-up runs.
+        trials (int): The maximum number of timed runs.
+
+    Returns:
+        List[Dict]: The results for the bare interpreter and for the import.
+    """
+    def run(code: str) -> str:
+        return subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+
+    loaded = run(IMPORT_SNIPPET).strip()
+    if loaded:
+        print(f"WARNING: importing testing for Cipher.encrypt loaded {loaded}")
+    return [
+        {"benchmark": "import.interpreter", "size": 0, **measure(lambda: run("pass"), warmup, trials)},
+        {"benchmark": "import.testing", "size": 0, "heavy_modules": loaded.split(",") if loaded else [],
+         **measure(lambda: run(IMPORT_SNIPPET), warmup, trials)},
+    ]
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """
+    Compares results against a baseline run.
+
+    Parameters:
+        results (List[Dict]): The current results.
+        baseline (List[Dict]): The baseline results.
+        tolerance (float): The allowed relative slowdown of the median, e.g. 0.1 for 10%.
+
+    Returns:
+        List[str]: A description of every benchmark whose median regressed.
+    """
+    previous = {(entry["benchmark"], entry["size"]): entry for entry in baseline}
+    regressions = []
+    for entry in results:
+        old = previous.get((entry["benchmark"], entry["size"]))
+        if old is None:
+            continue
+        ratio = entry["median_ns"] / max(old["median_ns"], 1.0)
+        if ratio > 1 + tolerance:
+            regressions.append(f"{entry['benchmark']} @ {entry['size']} B: "
+                               f"{old['median_ns'] / 1e6:.3f} ms -> {entry['median_ns'] / 1e6:.3f} ms "
+                               f"({ratio:.2f}x)")
+    return regressions
+
+
+def print_table(results: List[Dict]) -> None:
+    """
+    Prints the results in a table.
+
+    Parameters:
+        results (List[Dict]): The benchmark results.
+    """
+    table = PrettyTable()
+    table.field_names = ["Benchmark", "Size (B)", "Trials", "Median (ms)", "p95 (ms)", "MB/s"]
+    for entry in results:
+        table.add_row([entry["benchmark"], entry["size"], entry["trials"], f"{entry['median_ns'] / 1e6:.4f}",
+                       f"{entry['p95_ns'] / 1e6:.4f}", f"{entry.get('mb_per_s', 0.0):.3f}"])
+    print(table)
+
+
+def main() -> int:
+    """
+    Runs the selected benchmark suites, writes the JSON report and checks it against
+    a baseline.
+
+    Returns:
+        int: The exit status, 1 if a regression was found.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the ciphers and the Scoring metrics.")
+    parser.add_argument("--suite", choices=["cipher", "metrics", "levenshtein", "import", "all"], default="all")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="input sizes in bytes for the cipher suite")
+    parser.add_argument("--metric-sizes", type=int, nargs="+", default=[10, 1_000, 10_000],
+                        help="input sizes in bytes for the metrics suite")
+    parser.add_argument("--levenshtein-sizes", type=int, nargs="+", default=[100, 1000, 2000, 10000],
+                        help="plaintext lengths for the Levenshtein suite")
+    parser.add_argument("--ciphers", nargs="+", choices=sorted(CIPHER_CLASSES), default=["Cipher", "AESCipher"])
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs before each measurement")
+    parser.add_argument("--trials", type=int, default=10, help="maximum timed runs per measurement")
+    parser.add_argument("--budget", type=float, default=5.0, help="time budget in seconds per measurement")
+    parser.add_argument("--dp-limit", type=int, default=2000, help="largest plaintext length for the quadratic DP")
+    parser.add_argument("--band", type=int, default=64, help="distance cap for the banded backend")
+    parser.add_argument("--random-source", choices=["python", "numpy", "urandom"], default="python",
+                        help="where the ciphers draw their randomness from")
+    parser.add_argument("--seed", type=int, help="seed the random source for reproducible inputs and ciphertexts")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against the results in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative slowdown of the median")
+    args = parser.parse_args()
+
+    random_source = make_random_source(args.random_source, args.seed)
+    results = []
+    if args.suite in ("cipher", "all"):
+        results += benchmark_ciphers(args.sizes, args.ciphers, args.warmup, args.trials, args.budget, random_source)
+    if args.suite in ("metrics", "all"):
+        results += benchmark_metrics(args.metric_sizes, args.warmup, args.trials, args.budget, random_source)
+    if args.suite in ("levenshtein", "all"):
+        results += benchmark_levenshtein(args.levenshtein_sizes, args.dp_limit, args.band, args.trials,
+                                         random_source)
+    if args.suite in ("import", "all"):
+        results += benchmark_import(args.warmup, args.trials)
+    print_table(results)
+
+    if args.output:
+        report = {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "random_source": args.random_source,
+            "seed": args.seed,
+            "results": results,
+        }
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file)["results"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            return 1
+        print("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
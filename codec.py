@@ -0,0 +1,248 @@
+import struct
+from typing import Tuple, Union
+
+import numpy as np
+
+from testing import DEFAULT_RANDOM_SOURCE, RandomSource, _codepoints_text, _string_codes
+
+# Fixed header: magic, format version, decryption shift, bytes per character,
+# flags and the number of plaintext characters
+HEADER = struct.Struct("<2sBbBBQ")
+MAGIC = b"CP"
+VERSION = 1
+# The noise is regenerated from an 8-byte seed stored after the header
+FLAG_SEEDED_NOISE = 0x01
+# The text form has no noise after its last character (odd-length ciphertexts)
+FLAG_SHORT_NOISE = 0x02
+SEED = struct.Struct("<Q")
+
+# Cipher.encrypt() draws noise from this range, which fits in 12 bits
+NOISE_LOW = ord("!")
+NOISE_HIGH = ord("য")
+_WIDTHS = {1: "<u1", 2: "<u2", 4: "<u4"}
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def _width(codepoints: np.ndarray) -> int:
+    """
+    Chooses the smallest number of bytes that holds every codepoint.
+
+    Parameters:
+        codepoints (np.ndarray): The codepoints to store.
+
+    Returns:
+        int: 1, 2 or 4.
+    """
+    top = int(codepoints.max()) if codepoints.size else 0
+    return 1 if top < 1 << 8 else 2 if top < 1 << 16 else 4
+
+
+def _pack_noise(noise: np.ndarray) -> bytes:
+    """
+    Packs noise codepoints as 12-bit offsets from NOISE_LOW, two per three bytes.
+
+    Parameters:
+        noise (np.ndarray): The noise codepoints.
+
+    Returns:
+        bytes: The packed noise.
+    """
+    offsets = noise.astype(np.int64) - NOISE_LOW
+    if offsets.size and (offsets.min() < 0 or offsets.max() >= 1 << 12):
+        raise ValueError("Noise characters outside the Cipher range cannot be packed")
+    if offsets.size % 2:
+        offsets = np.append(offsets, 0)
+    a, b = offsets[0::2], offsets[1::2]
+    packed = np.empty((a.size, 3), dtype=np.uint8)
+    packed[:, 0] = a & 0xFF
+    packed[:, 1] = (a >> 8) | ((b & 0x0F) << 4)
+    packed[:, 2] = b >> 4
+    return packed.tobytes()
+
+
+def _unpack_noise(buffer: Buffer, offset: int, count: int) -> np.ndarray:
+    """
+    Reverses _pack_noise().
+
+    Parameters:
+        buffer (Buffer): The packed ciphertext.
+        offset (int): The position of the packed noise.
+        count (int): The number of noise characters.
+
+    Returns:
+        np.ndarray: The noise codepoints.
+    """
+    packed = np.frombuffer(buffer, dtype=np.uint8, count=(count + 1) // 2 * 3, offset=offset)
+    packed = packed.reshape(-1, 3).astype(np.int64)
+    noise = np.empty(packed.shape[0] * 2, dtype=np.int64)
+    noise[0::2] = packed[:, 0] | ((packed[:, 1] & 0x0F) << 8)
+    noise[1::2] = (packed[:, 1] >> 4) | (packed[:, 2] << 4)
+    return noise[:count] + NOISE_LOW
+
+
+def _seeded_noise(seed: int, count: int) -> np.ndarray:
+    """
+    Generates the noise of a seeded ciphertext.
+
+    Parameters:
+        seed (int): The seed stored in the ciphertext.
+        count (int): The number of noise characters.
+
+    Returns:
+        np.ndarray: The noise codepoints.
+    """
+    return np.random.default_rng(seed).integers(NOISE_LOW, NOISE_HIGH + 1, size=count)
+
+
+def _build(shift: int, data: np.ndarray, flags: int, seed: bytes = b"", noise: bytes = b"") -> bytes:
+    """
+    Assembles a packed ciphertext.
+
+    Parameters:
+        shift (int): The decryption shift.
+        data (np.ndarray): The shifted characters in ciphertext order.
+        flags (int): The FLAG_* bits.
+        seed (bytes): The packed noise seed, stored before the characters.
+        noise (bytes): The packed noise, stored after the characters.
+
+    Returns:
+        bytes: The packed ciphertext.
+    """
+    width = _width(data)
+    header = HEADER.pack(MAGIC, VERSION, shift, width, flags, data.size)
+    return b"".join((header, seed, data.astype(_WIDTHS[width]).tobytes(), noise))
+
+
+def encrypt_packed(original_string: str, random_source: RandomSource = None) -> bytes:
+    """
+    Encrypts a string straight into the packed format. The characters are reversed
+    and shifted as in Cipher.encrypt(), and the noise is represented by its seed, so
+    the result is about one byte per ASCII character instead of three or more.
+
+    Parameters:
+        original_string (str): The string to encrypt.
+        random_source (RandomSource): The source of the shift and the noise seed. Defaults to
+                                      DEFAULT_RANDOM_SOURCE.
+
+    Returns:
+        bytes: The packed ciphertext.
+    """
+    if not original_string:
+        raise ValueError("Cannot encrypt an empty string")
+    random_source = random_source or DEFAULT_RANDOM_SOURCE
+    shift = random_source.randint(0, 7)
+    data = _string_codes(original_string)[::-1].astype(np.int64) - shift
+    if data.min() < 0:
+        raise ValueError("chr() arg not in range(0x110000)")
+    return _build(shift, data, FLAG_SEEDED_NOISE, seed=random_source.bytes(SEED.size))
+
+
+def pack(encrypted_string: str) -> bytes:
+    """
+    Converts a text ciphertext from Cipher.encrypt() into the packed format. The noise
+    is kept as 12-bit values, so unpack() gives back the exact text.
+
+    Parameters:
+        encrypted_string (str): The text ciphertext.
+
+    Returns:
+        bytes: The packed ciphertext.
+    """
+    if len(encrypted_string) < 2 or not "0" <= encrypted_string[0] <= "9":
+        raise ValueError("Encrypted string does not start with a shift digit")
+    codepoints = _string_codes(encrypted_string[1:]).astype(np.int64)
+    flags = FLAG_SHORT_NOISE if codepoints.size % 2 == 0 else 0
+    # Layout after the digit: first char, then (char, noise) pairs
+    data = np.concatenate((codepoints[:1], codepoints[1::2]))
+    noise = codepoints[2::2]
+    return _build(int(encrypted_string[0]) - 2, data, flags, noise=_pack_noise(noise))
+
+
+def read_header(buffer: Buffer) -> Tuple[int, int, int, int]:
+    """
+    Reads and checks the header of a packed ciphertext without copying the payload.
+
+    Parameters:
+        buffer (Buffer): The packed ciphertext, any object supporting the buffer protocol (e.g. an mmap).
+
+    Returns:
+        Tuple[int, int, int, int]: The decryption shift, the bytes per character, the flags and the number of characters.
+    """
+    if len(buffer) < HEADER.size:
+        raise ValueError("Truncated ciphertext header")
+    magic, version, shift, width, flags, length = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError("Not a packed ciphertext")
+    if version != VERSION:
+        raise ValueError(f"Unsupported packed ciphertext version {version}")
+    if width not in _WIDTHS:
+        raise ValueError(f"Invalid character width {width}")
+    return shift, width, flags, length
+
+
+def _noise_count(flags: int, length: int) -> int:
+    """
+    Computes the number of noise characters in a ciphertext.
+
+    Parameters:
+        flags (int): The FLAG_* bits.
+        length (int): The number of characters.
+
+    Returns:
+        int: The number of noise characters.
+    """
+    return max(0, length - 1 - (1 if flags & FLAG_SHORT_NOISE else 0))
+
+
+def decrypt_packed(buffer: Buffer) -> str:
+    """
+    Decrypts a packed ciphertext. The characters are read in place through
+    np.frombuffer, so bytes, bytearray, memoryview and mmap objects are decrypted
+    without slicing copies, and the noise is never touched.
+
+    Parameters:
+        buffer (Buffer): The packed ciphertext.
+
+    Returns:
+        str: The decrypted string.
+    """
+    shift, width, flags, length = read_header(buffer)
+    offset = HEADER.size + (SEED.size if flags & FLAG_SEEDED_NOISE else 0)
+    if len(buffer) < offset + length * width:
+        raise ValueError("Truncated packed ciphertext")
+    data = np.frombuffer(buffer, dtype=_WIDTHS[width], count=length, offset=offset)
+    return _codepoints_text(data[::-1].astype(np.int64) + shift)
+
+
+def unpack(buffer: Buffer) -> str:
+    """
+    Converts a packed ciphertext back to the text format of Cipher.encrypt(), which
+    Cipher.decrypt() and the Scoring metrics accept.
+
+    Parameters:
+        buffer (Buffer): The packed ciphertext.
+
+    Returns:
+        str: The text ciphertext.
+    """
+    shift, width, flags, length = read_header(buffer)
+    offset = HEADER.size
+    noise_count = _noise_count(flags, length)
+    seeded = flags & FLAG_SEEDED_NOISE
+    if seeded:
+        offset += SEED.size
+    noise_size = 0 if seeded else (noise_count + 1) // 2 * 3
+    if length == 0 or len(buffer) < offset + length * width + noise_size:
+        raise ValueError("Truncated packed ciphertext")
+    if seeded:
+        noise = _seeded_noise(SEED.unpack_from(buffer, HEADER.size)[0], noise_count)
+    else:
+        noise = _unpack_noise(buffer, offset + length * width, noise_count)
+    data = np.frombuffer(buffer, dtype=_WIDTHS[width], count=length, offset=offset).astype(np.int64)
+
+    out = np.empty(length + noise_count, dtype=np.int64)
+    out[0] = data[0]
+    out[1::2] = data[1:]
+    out[2::2] = noise
+    return str(shift + 2) + _codepoints_text(out)
@@ -0,0 +1,118 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from streaming import FRAME_HEADER_SIZE, decrypt_frames, encrypt_frames
+from testing import NumpyRandomSource
+
+DEFAULT_PARALLEL_CHUNK_SIZE = 1 << 20
+
+
+def _split(text: str, chunk_size: int) -> Iterator[List[str]]:
+    """
+    Splits a payload into single-chunk tasks, so each worker is sent only its own slice.
+
+    Parameters:
+        text (str): The payload.
+        chunk_size (int): The number of characters per chunk.
+
+    Yields:
+        List[str]: A one-element list with the next chunk.
+    """
+    for start in range(0, len(text), chunk_size):
+        yield [text[start:start + chunk_size]]
+
+
+def _encrypt_task(task: Tuple[List[str], np.random.SeedSequence]) -> str:
+    """
+    Encrypts one task with its own random stream. Forked workers inherit the parent's
+    generators, so without a per-task seed they would all draw the same shifts and noise.
+
+    Parameters:
+        task (Tuple[List[str], np.random.SeedSequence]): The chunks and the seed of their randomness.
+
+    Returns:
+        str: The frames.
+    """
+    chunks, seed = task
+    return encrypt_frames(chunks, NumpyRandomSource(seed))
+
+
+def frame_index(ciphertext: str) -> List[Tuple[int, int]]:
+    """
+    Builds the index of a framed ciphertext by hopping from one length header to the next.
+
+    Parameters:
+        ciphertext (str): The output of encrypt_parallel() or streaming.encrypt_stream().
+
+    Returns:
+        List[Tuple[int, int]]: The start and end offset of each frame payload, in order.
+    """
+    index = []
+    position = 0
+    while position < len(ciphertext):
+        start = position + FRAME_HEADER_SIZE
+        end = start + int(ciphertext[position:start], 16)
+        if end > len(ciphertext):
+            raise ValueError("Truncated ciphertext stream")
+        index.append((start, end))
+        position = end
+    return index
+
+
+def _run(function, tasks: Iterator[List[str]], workers: int) -> str:
+    """
+    Runs a frame function over the tasks, in a process pool when more than one
+    worker is requested, and joins the results in task order.
+
+    Parameters:
+        function (Callable): _encrypt_task or decrypt_frames.
+        tasks (Iterator[List[str]]): The arguments for each call.
+        workers (int): The number of worker processes.
+
+    Returns:
+        str: The joined results.
+    """
+    if workers == 1:
+        return "".join(map(function, tasks))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return "".join(executor.map(function, tasks))
+
+
+def encrypt_parallel(text: str, workers: int = None, chunk_size: int = DEFAULT_PARALLEL_CHUNK_SIZE) -> str:
+    """
+    Encrypts one large payload as independently encrypted chunks on several cores.
+    The result is a framed stream, compatible with streaming.decrypt_stream(), whose
+    length headers form the index used by decrypt_parallel().
+
+    Parameters:
+        text (str): The payload to encrypt.
+        workers (int): The number of worker processes. Defaults to the number of CPUs.
+        chunk_size (int): The number of characters per chunk.
+
+    Returns:
+        str: The framed ciphertext.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive number")
+    # One independent child seed per chunk, spawned in the parent
+    seeds = np.random.SeedSequence()
+    tasks = ((chunks, seeds.spawn(1)[0]) for chunks in _split(text, chunk_size))
+    return _run(_encrypt_task, tasks, workers or os.cpu_count() or 1)
+
+
+def decrypt_parallel(ciphertext: str, workers: int = None) -> str:
+    """
+    Decrypts a framed ciphertext, sending each frame to a worker process.
+
+    Parameters:
+        ciphertext (str): The output of encrypt_parallel().
+        workers (int): The number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+        str: The decrypted payload.
+    """
+    tasks = ([ciphertext[start:end]] for start, end in frame_index(ciphertext))
+    return _run(decrypt_frames, tasks, workers or os.cpu_count() or 1)
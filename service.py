@@ -0,0 +1,550 @@
+import asyncio
+import json
+import os
+import struct
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from testing import DEFAULT_WEIGHTS, Cipher, score_records
+
+# Every message is a 4-byte big-endian length followed by that many bytes of UTF-8 JSON
+FRAME_HEADER = struct.Struct(">I")
+MAX_FRAME_SIZE = 64 << 20
+DEFAULT_PORT = 8765
+# Latency samples kept per operation for the percentiles
+LATENCY_WINDOW = 10_000
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Dict[str, object]:
+    """
+    Reads one length-prefixed JSON message.
+
+    Parameters:
+        reader (asyncio.StreamReader): The connection.
+
+    Returns:
+        Dict[str, object]: The message, or None when the peer closed the connection between
+        messages. A truncated or undecodable message raises ValueError.
+    """
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+    (length,) = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise ValueError(f"Frame of {length} bytes exceeds the {MAX_FRAME_SIZE}-byte limit")
+    try:
+        body = await reader.readexactly(length)
+    except asyncio.IncompleteReadError as error:
+        raise ValueError(f"Truncated frame: {len(error.partial)} of {length} bytes") from None
+    return json.loads(body)
+
+
+def encode_frame(message: Dict[str, object]) -> bytes:
+    """
+    Encodes one message as a length-prefixed JSON frame.
+
+    Parameters:
+        message (Dict[str, object]): The message.
+
+    Returns:
+        bytes: The frame.
+    """
+    body = json.dumps(message, ensure_ascii=False).encode("utf-8", "surrogatepass")
+    return FRAME_HEADER.pack(len(body)) + body
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    """
+    Summarizes latency samples.
+
+    Parameters:
+        samples (List[float]): The latencies in seconds.
+
+    Returns:
+        Dict[str, float]: The sample count and the median, 95th and 99th percentile and maximum in milliseconds.
+    """
+    if not samples:
+        return {"count": 0}
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1e3
+    return {"count": len(samples), "p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99),
+            "max_ms": float(max(samples)) * 1e3}
+
+
+def _call_batch(function: Callable[[List[object]], List[object]], payloads: List[object]) -> List[object]:
+    """
+    Runs a batch function, falling back to one call per payload if the batch fails,
+    so a single bad request only fails itself. This runs in the executor, possibly
+    in another process.
+
+    Parameters:
+        function (Callable): Maps a list of payloads to a list of results, in order.
+        payloads (List[object]): The payloads.
+
+    Returns:
+        List[object]: The result or the exception for each payload.
+    """
+    try:
+        return function(payloads)
+    except Exception:
+        if len(payloads) == 1:
+            raise
+    results = []
+    for payload in payloads:
+        try:
+            results.append(function([payload])[0])
+        except Exception as error:
+            results.append(error)
+    return results
+
+
+class MicroBatcher:
+    """
+    The MicroBatcher class collects the requests that arrive within a short window
+    and hands them to a batch function in a single call. Its queue is bounded, so
+    when the batch function falls behind, submit() blocks and the connections stop
+    being read, which pushes back on the clients through TCP.
+
+    Attributes:
+        requests (int): The number of requests completed.
+        errors (int): The number of requests that failed.
+        batches (int): The number of batch calls made.
+        latencies (deque): The most recent request latencies in seconds, from submit to result.
+    """
+
+    def __init__(self, function: Callable[[List[object]], List[object]], executor: Executor,
+                 max_batch_size: int = 256, max_delay: float = 0.002, max_queue: int = 4096) -> None:
+        """
+        The constructor for the MicroBatcher class.
+
+        Parameters:
+            function (Callable): Maps a list of payloads to a list of results, in order.
+            executor (Executor): Where the batch function runs, off the event loop.
+            max_batch_size (int): The largest number of requests per call.
+            max_delay (float): How long in seconds the first request of a batch waits for others.
+            max_queue (int): The number of queued requests beyond which submit() blocks.
+        """
+        self.function = function
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.queue: asyncio.Queue = asyncio.Queue(max_queue)
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self._task = None
+
+    def start(self) -> None:
+        """
+        Starts the batching loop on the running event loop.
+        """
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stops the batching loop.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def submit(self, payload: object) -> asyncio.Future:
+        """
+        Queues a payload, waiting while the queue is full.
+
+        Parameters:
+            payload (object): The request payload.
+
+        Returns:
+            asyncio.Future: Resolves to the result for this payload.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((payload, future, time.perf_counter()))
+        return future
+
+    async def _next_batch(self) -> List[tuple]:
+        """
+        Waits for a request, then gathers more until the batch is full or the delay is up.
+
+        Returns:
+            List[tuple]: The queued (payload, future, submit time) entries.
+        """
+        batch = [await self.queue.get()]
+        deadline = time.perf_counter() + self.max_delay
+        while len(batch) < self.max_batch_size:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        """
+        The batching loop.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            try:
+                results = await loop.run_in_executor(self.executor, _call_batch, self.function,
+                                                     [entry[0] for entry in batch])
+            except Exception as error:
+                results = [error] * len(batch)
+            self.batches += 1
+            finished = time.perf_counter()
+            for (_, future, submitted), result in zip(batch, results):
+                self.requests += 1
+                self.latencies.append(finished - submitted)
+                if future.cancelled():
+                    continue
+                if isinstance(result, Exception):
+                    self.errors += 1
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Reports the counters of this batcher.
+
+        Returns:
+            Dict[str, object]: The request, error and batch counts, the mean batch size,
+            the queue depth and the latency percentiles.
+        """
+        return {"requests": self.requests, "errors": self.errors, "batches": self.batches,
+                "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+                "queued": self.queue.qsize(), "latency": latency_summary(list(self.latencies))}
+
+
+def _score_batch(texts: List[str], weights: Dict[str, float], max_length_multiplier: float,
+                 timing_trials: int) -> List[Dict[str, object]]:
+    """
+    Scores a batch of strings for the score operation.
+
+    Parameters:
+        texts (List[str]): The strings.
+        weights (Dict[str, float]): A dictionary containing the weights for each metric.
+        max_length_multiplier (float): The maximum allowed ratio of the length of the encrypted string
+                                       to the length of the original string.
+        timing_trials (int): The number of timed encryptions for each running time.
+
+    Returns:
+        List[Dict[str, object]]: The score_records() result for each string.
+    """
+    return score_records(list(enumerate(texts)), weights, max_length_multiplier, timing_trials=timing_trials)
+
+
+class EncryptionService:
+    """
+    The EncryptionService class is an asyncio TCP server for the encrypt, decrypt and
+    score operations. Requests are length-prefixed JSON objects with an "op", a "data"
+    string and an optional "id" that is echoed back; a connection may pipeline
+    requests, and each answer is {"id", "ok", "result"} or {"id", "ok": false, "error"}.
+    The "stats" operation returns the service counters.
+
+    Attributes:
+        batchers (Dict[str, MicroBatcher]): The batcher behind each operation.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, weights: Dict[str, float] = None,
+                 max_length_multiplier: float = 2.0, workers: int = 1, max_batch_size: int = 256,
+                 max_delay: float = 0.002, max_queue: int = 4096, timing_trials: int = 1) -> None:
+        """
+        The constructor for the EncryptionService class.
+
+        Parameters:
+            host (str): The address to listen on.
+            port (int): The port to listen on; 0 picks a free one.
+            weights (Dict[str, float]): The metric weights for the score operation. Defaults to DEFAULT_WEIGHTS.
+            max_length_multiplier (float): The maximum allowed ratio of the length of the encrypted string
+                                           to the length of the original string.
+            workers (int): The number of processes scoring batches; 1 uses a thread.
+            max_batch_size (int): The largest number of requests per batch call.
+            max_delay (float): How long in seconds a request waits for others to batch with.
+            max_queue (int): The number of queued requests per operation before reads stop.
+            timing_trials (int): The number of timed encryptions for each scored running time.
+        """
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self._cipher_executor = ThreadPoolExecutor(max_workers=1)
+        self._score_executor = (ProcessPoolExecutor(max_workers=workers) if workers > 1
+                                else ThreadPoolExecutor(max_workers=1))
+        score = partial(_score_batch, weights=weights or DEFAULT_WEIGHTS,
+                        max_length_multiplier=max_length_multiplier, timing_trials=timing_trials)
+        batcher = partial(MicroBatcher, max_batch_size=max_batch_size, max_delay=max_delay, max_queue=max_queue)
+        self.batchers: Dict[str, MicroBatcher] = {
+            "encrypt": batcher(Cipher.encrypt_many, self._cipher_executor),
+            "decrypt": batcher(Cipher.decrypt_many, self._cipher_executor),
+            "score": batcher(score, self._score_executor),
+        }
+        self.connections = 0
+        self._started = time.perf_counter()
+        self._server = None
+
+    async def start(self) -> None:
+        """
+        Starts listening and the batching loops. The bound port is stored in port.
+        """
+        for batcher in self.batchers.values():
+            batcher.start()
+        self._started = time.perf_counter()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, backlog=4096)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        """
+        Stops accepting connections, stops the batching loops and shuts the executors down.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for batcher in self.batchers.values():
+            await batcher.stop()
+        self._cipher_executor.shutdown()
+        self._score_executor.shutdown()
+
+    async def serve_forever(self) -> None:
+        """
+        Starts the service and runs until cancelled.
+        """
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Reports the service counters.
+
+        Returns:
+            Dict[str, object]: The uptime, open connections, overall throughput and the
+            counters of each operation.
+        """
+        uptime = time.perf_counter() - self._started
+        requests = sum(batcher.requests for batcher in self.batchers.values())
+        return {"uptime_s": uptime, "connections": self.connections, "requests": requests,
+                "requests_per_s": requests / uptime if uptime > 0 else 0.0,
+                "operations": {op: batcher.stats() for op, batcher in self.batchers.items()}}
+
+    async def _respond(self, writer: asyncio.StreamWriter, request_id: object, future: asyncio.Future) -> None:
+        """
+        Writes the answer to one request once its batch is done.
+
+        Parameters:
+            writer (asyncio.StreamWriter): The connection.
+            request_id (object): The id to echo back.
+            future (asyncio.Future): The pending result.
+        """
+        try:
+            message = {"id": request_id, "ok": True, "result": await future}
+        except Exception as error:
+            message = {"id": request_id, "ok": False, "error": f"{type(error).__name__}: {error}"}
+        await self._reply(writer, message)
+
+    async def _reply(self, writer: asyncio.StreamWriter, message: Dict) -> None:
+        """
+        Sends one reply and waits until the transport has room again, so a client that
+        does not read its replies cannot make them pile up in memory.
+
+        Parameters:
+            writer (asyncio.StreamWriter): The connection.
+            message (Dict): The reply.
+        """
+        if not writer.is_closing():
+            writer.write(encode_frame(message))
+            await writer.drain()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serves one connection until the client closes it.
+
+        Parameters:
+            reader (asyncio.StreamReader): The incoming side of the connection.
+            writer (asyncio.StreamWriter): The outgoing side of the connection.
+        """
+        self.connections += 1
+        pending = set()
+        try:
+            while True:
+                try:
+                    request = await read_frame(reader)
+                except (ValueError, ConnectionError) as error:
+                    await self._reply(writer, {"id": None, "ok": False, "error": f"Bad frame: {error}"})
+                    break
+                if request is None:
+                    break
+                if not isinstance(request, dict):
+                    await self._reply(writer, {"id": None, "ok": False, "error": "Expected a JSON object"})
+                    continue
+                op = request.get("op")
+                request_id = request.get("id")
+                if op == "stats":
+                    await self._reply(writer, {"id": request_id, "ok": True, "result": self.stats()})
+                    continue
+                if op not in self.batchers or not isinstance(request.get("data"), str):
+                    await self._reply(writer, {"id": request_id, "ok": False,
+                                               "error": f"Expected an op in {sorted(self.batchers)} and a data string"})
+                    continue
+                # Blocks while the queue is full, which stops reading from this client
+                future = await self.batchers[op].submit(request["data"])
+                task = asyncio.ensure_future(self._respond(writer, request_id, future))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        except ConnectionError:
+            # The client went away while a reply was being sent
+            pass
+        finally:
+            # Answer what was already accepted, however the connection ended
+            await asyncio.gather(*pending, return_exceptions=True)
+            self.connections -= 1
+            writer.close()
+
+
+async def _client(host: str, port: int, op: str, payload: str, requests: int, connect_gate: asyncio.Semaphore,
+                  latencies: List[float]) -> int:
+    """
+    Opens one connection and sends requests one after another, recording each latency.
+
+    Parameters:
+        host (str): The service address.
+        port (int): The service port.
+        op (str): The operation to request.
+        payload (str): The data of every request.
+        requests (int): The number of requests to send.
+        connect_gate (asyncio.Semaphore): Limits the number of connections being opened at once.
+        latencies (List[float]): Receives the latency of every successful request in seconds.
+
+    Returns:
+        int: The number of failed requests.
+    """
+    async with connect_gate:
+        reader, writer = await asyncio.open_connection(host, port)
+    errors = 0
+    frame = encode_frame({"op": op, "data": payload})
+    try:
+        for _ in range(requests):
+            start = time.perf_counter()
+            writer.write(frame)
+            await writer.drain()
+            answer = await read_frame(reader)
+            if answer is None or not answer["ok"]:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+    return errors
+
+
+async def run_load(host: str = "127.0.0.1", port: int = DEFAULT_PORT, connections: int = 1000,
+                   requests: int = 10, op: str = "encrypt", size: int = 64) -> Dict[str, object]:
+    """
+    Drives the service with many concurrent connections, each sending requests back
+    to back, and reports the throughput and latency seen by the clients.
+
+    Parameters:
+        host (str): The service address.
+        port (int): The service port.
+        connections (int): The number of concurrent connections.
+        requests (int): The number of requests per connection.
+        op (str): The operation to request.
+        size (int): The length of the request payload.
+
+    Returns:
+        Dict[str, object]: The request and error counts, the wall time, the requests per
+        second and the latency percentiles.
+    """
+    payload = "".join(chr(ord("a") + i % 26) for i in range(size))
+    if op == "decrypt":
+        payload = Cipher.encrypt_many([payload])[0]
+    latencies: List[float] = []
+    connect_gate = asyncio.Semaphore(256)
+    start = time.perf_counter()
+    errors = await asyncio.gather(*(_client(host, port, op, payload, requests, connect_gate, latencies)
+                                    for _ in range(connections)), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    failed_connections = sum(isinstance(result, Exception) for result in errors)
+    return {"connections": connections, "failed_connections": failed_connections,
+            "requests": len(latencies), "errors": sum(result for result in errors if isinstance(result, int)),
+            "wall_s": elapsed, "requests_per_s": len(latencies) / elapsed,
+            "latency": latency_summary(latencies)}
+
+
+async def fetch_stats(host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> Dict[str, object]:
+    """
+    Asks a running service for its counters.
+
+    Parameters:
+        host (str): The service address.
+        port (int): The service port.
+
+    Returns:
+        Dict[str, object]: The result of the stats operation.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(encode_frame({"op": "stats"}))
+        await writer.drain()
+        return (await read_frame(reader))["result"]
+    finally:
+        writer.close()
+
+
+def main(argv: List[str] = None) -> None:
+    """
+    Runs the service, or the load generator against a running service.
+
+    Parameters:
+        argv (List[str]): The command-line arguments. Defaults to sys.argv[1:].
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve Cipher and Scoring over TCP, or load-test the service.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="run the service")
+    load = commands.add_parser("load", help="run the load generator")
+    for command in (serve, load):
+        command.add_argument("--host", default="127.0.0.1")
+        command.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--workers", type=int, default=1, help="processes for the score operation")
+    serve.add_argument("--max-batch-size", type=int, default=256, help="largest number of requests per batch")
+    serve.add_argument("--max-delay-ms", type=float, default=2.0, help="batching window in milliseconds")
+    serve.add_argument("--max-queue", type=int, default=4096, help="queued requests per operation before reads stop")
+    load.add_argument("--connections", type=int, default=1000, help="number of concurrent connections")
+    load.add_argument("--requests", type=int, default=10, help="requests per connection")
+    load.add_argument("--op", choices=["encrypt", "decrypt", "score"], default="encrypt")
+    load.add_argument("--size", type=int, default=64, help="payload length in characters")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        service = EncryptionService(args.host, args.port, workers=args.workers, max_batch_size=args.max_batch_size,
+                                    max_delay=args.max_delay_ms / 1e3, max_queue=args.max_queue)
+        print(f"Serving on {args.host}:{args.port} (pid {os.getpid()})")
+        try:
+            asyncio.run(service.serve_forever())
+        except KeyboardInterrupt:
+            pass
+        return
+
+    report = asyncio.run(run_load(args.host, args.port, args.connections, args.requests, args.op, args.size))
+    report["server"] = asyncio.run(fetch_stats(args.host, args.port))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,194 @@
+import codecs
+import mmap
+from typing import Iterable, Iterator, List
+
+from testing import Cipher, RandomSource
+
+# Each frame is an 8-digit hex length followed by that many characters of Cipher output
+FRAME_HEADER_SIZE = 8
+DEFAULT_CHUNK_SIZE = 1 << 16
+# Number of chunks handed to Cipher.encrypt_many / decrypt_many at once
+DEFAULT_BATCH_SIZE = 16
+
+
+def read_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, use_mmap: bool = False,
+                encoding: str = "utf-8") -> Iterator[str]:
+    """
+    Reads a text file as a sequence of chunks of at most chunk_size characters.
+
+    Parameters:
+        path (str): The file to read.
+        chunk_size (int): The number of characters per chunk.
+        use_mmap (bool): Map the file into memory instead of using buffered reads.
+        encoding (str): The text encoding of the file.
+
+    Yields:
+        str: The next chunk of the file.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive number")
+    if not use_mmap:
+        with open(path, "r", encoding=encoding, newline="") as file:
+            while True:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    with open(path, "rb") as file:
+        try:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            return
+        with mapped:
+            decoder = codecs.getincrementaldecoder(encoding)()
+            pending = ""
+            # chunk_size bytes never decode to more than chunk_size characters
+            for offset in range(0, len(mapped), chunk_size):
+                pending += decoder.decode(mapped[offset:offset + chunk_size])
+                while len(pending) >= chunk_size:
+                    yield pending[:chunk_size]
+                    pending = pending[chunk_size:]
+            pending += decoder.decode(b"", final=True)
+            if pending:
+                yield pending
+
+
+def _batches(chunks: Iterable[str], batch_size: int) -> Iterator[List[str]]:
+    """
+    Groups non-empty chunks into lists of batch_size.
+
+    Parameters:
+        chunks (Iterable[str]): The plaintext chunks.
+        batch_size (int): The number of chunks per batch.
+
+    Yields:
+        List[str]: The next batch of chunks.
+    """
+    batch: List[str] = []
+    for chunk in chunks:
+        if not chunk:
+            continue
+        batch.append(chunk)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def encrypt_stream(chunks: Iterable[str], batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[str]:
+    """
+    Encrypts a stream of plaintext chunks into a stream of frames. Every chunk is
+    encrypted independently, so each frame carries its own shift header, and only
+    one batch of chunks is held in memory at a time.
+
+    Parameters:
+        chunks (Iterable[str]): The plaintext chunks, e.g. from read_chunks().
+        batch_size (int): The number of chunks encrypted per vectorized call.
+
+    Yields:
+        str: The framed ciphertext for each batch of chunks.
+    """
+    for batch in _batches(chunks, batch_size):
+        yield encrypt_frames(batch)
+
+
+def encrypt_frames(chunks: List[str], random_source: RandomSource = None) -> str:
+    """
+    Encrypts a list of non-empty chunks into consecutive frames.
+
+    Parameters:
+        chunks (List[str]): The plaintext chunks.
+        random_source (RandomSource): Optional source of the shifts and the noise.
+
+    Returns:
+        str: The frames, each with its length header.
+    """
+    frames = Cipher.encrypt_many(chunks, random_source)
+    return "".join(f"{len(frame):0{FRAME_HEADER_SIZE}x}{frame}" for frame in frames)
+
+
+def decrypt_frames(frames: List[str]) -> str:
+    """
+    Decrypts a list of frames and joins the plaintext.
+
+    Parameters:
+        frames (List[str]): The frame payloads, without headers.
+
+    Returns:
+        str: The plaintext of all the frames.
+    """
+    plain = Cipher.decrypt_many(frames)
+    for i, frame in enumerate(frames):
+        # Cipher.decrypt drops the only character of a single-character chunk
+        if len(frame) == 2:
+            plain[i] = chr(ord(frame[1]) + int(frame[0]) - 2)
+    return "".join(plain)
+
+
+def decrypt_stream(pieces: Iterable[str], batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[str]:
+    """
+    Decrypts a framed ciphertext stream produced by encrypt_stream(). The stream may
+    arrive split at arbitrary points; only the current partial frame is buffered.
+
+    Parameters:
+        pieces (Iterable[str]): The framed ciphertext, in pieces of any size.
+        batch_size (int): The number of frames decrypted per vectorized call.
+
+    Yields:
+        str: The next part of the plaintext.
+    """
+    buffer = ""
+    position = 0
+    frames: List[str] = []
+    for piece in pieces:
+        buffer = buffer[position:] + piece
+        position = 0
+        while len(buffer) - position >= FRAME_HEADER_SIZE:
+            length = int(buffer[position:position + FRAME_HEADER_SIZE], 16)
+            end = position + FRAME_HEADER_SIZE + length
+            if end > len(buffer):
+                break
+            frames.append(buffer[position + FRAME_HEADER_SIZE:end])
+            position = end
+            if len(frames) == batch_size:
+                yield decrypt_frames(frames)
+                frames = []
+    if frames:
+        yield decrypt_frames(frames)
+    if len(buffer) > position:
+        raise ValueError("Truncated ciphertext stream")
+
+
+def encrypt_file(source: str, destination: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 use_mmap: bool = False) -> None:
+    """
+    Encrypts a text file into a framed ciphertext file in bounded memory.
+
+    Parameters:
+        source (str): The plaintext file.
+        destination (str): The ciphertext file to write.
+        chunk_size (int): The number of characters per frame.
+        use_mmap (bool): Read the source through mmap instead of buffered reads.
+    """
+    with open(destination, "w", encoding="utf-8", newline="") as output:
+        for frames in encrypt_stream(read_chunks(source, chunk_size, use_mmap)):
+            output.write(frames)
+
+
+def decrypt_file(source: str, destination: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 use_mmap: bool = False) -> None:
+    """
+    Decrypts a framed ciphertext file written by encrypt_file() in bounded memory.
+
+    Parameters:
+        source (str): The ciphertext file.
+        destination (str): The plaintext file to write.
+        chunk_size (int): The number of characters read at a time.
+        use_mmap (bool): Read the source through mmap instead of buffered reads.
+    """
+    with open(destination, "w", encoding="utf-8", newline="") as output:
+        for plain in decrypt_stream(read_chunks(source, chunk_size, use_mmap)):
+            output.write(plain)
@@ -1,51 +1,598 @@
+from __future__ import annotations
 
-
-
-import string
-from prettytable import PrettyTable
-import time
-import sys
+import array
+import copy
 import hashlib
+import heapq
+import importlib
+import json
 import math
+import os
 import random
-from collections import Counter
-from typing import Dict, List, Tuple
-from collections import Counter
-import math
+import statistics
 import string
-import random
-from prettytable import PrettyTable
+import sys
 import time
-import numpy as np
-from scipy.stats import entropy as scipy_entropy
+from contextlib import ExitStack
+from functools import cached_property, lru_cache, partial
 from itertools import combinations
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+
+class _LazyModule:
+    """
+    Stands in for a heavy module and imports it on first attribute access, so that
+    importing this file for Cipher.encrypt()/decrypt() alone stays fast. After the
+    first access the placeholder replaces itself with the real module.
+    """
+
+    def __init__(self, name: str, alias: str) -> None:
+        self._name = name
+        self._alias = alias
+
+    def __getattr__(self, attribute: str):
+        module = importlib.import_module(self._name)
+        globals()[self._alias] = module
+        return getattr(module, attribute)
+
+
+np = _LazyModule("numpy", "np")
      
 
+def levenshtein_dp(s1: str, s2: str) -> int:
+    """
+    Calculates the Levenshtein distance with the classic row-by-row dynamic program.
+
+    Parameters:
+        s1 (str): The first string.
+        s2 (str): The second string.
+
+    Returns:
+        int: The Levenshtein distance between the two strings.
+    """
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+
+    # len(s1) >= len(s2)
+    if len(s2) == 0:
+        return len(s1)
+
+    previous_row = range(len(s2) + 1)
+    for i, c1 in enumerate(s1):
+        current_row = [i + 1]
+        for j, c2 in enumerate(s2):
+            insertions = previous_row[j + 1] + 1
+            deletions = current_row[j] + 1
+            substitutions = previous_row[j] + (c1 != c2)
+            current_row.append(min(insertions, deletions, substitutions))
+        previous_row = current_row
+
+    return previous_row[-1]
+
+
+def levenshtein_myers(s1: str, s2: str, max_distance: int = None) -> int:
+    """
+    Calculates the Levenshtein distance with the bit-parallel algorithm of Myers
+    (as adapted to edit distance by Hyyro). The shorter string is packed into the
+    bits of a Python integer, so each character of the longer string costs a few
+    big-integer operations instead of a full DP row.
+
+    Parameters:
+        s1 (str): The first string.
+        s2 (str): The second string.
+        max_distance (int): Optional cap. Once the distance is certain to exceed it,
+                            the scan stops and max_distance + 1 is returned.
+
+    Returns:
+        int: The Levenshtein distance between the two strings.
+    """
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    m = len(s2)
+    if m == 0:
+        return len(s1) if max_distance is None else min(len(s1), max_distance + 1)
+
+    peq: Dict[str, int] = {}
+    for i, c in enumerate(s2):
+        peq[c] = peq.get(c, 0) | (1 << i)
+
+    mask = (1 << m) - 1
+    high_bit = 1 << (m - 1)
+    pv, mv, score = mask, 0, m
+    remaining = len(s1)
+    for c in s1:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & high_bit:
+            score += 1
+        elif mh & high_bit:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+        remaining -= 1
+        # The score can drop by at most one per remaining character
+        if max_distance is not None and score - remaining > max_distance:
+            return max_distance + 1
+    return score if max_distance is None else min(score, max_distance + 1)
+
+
+def levenshtein_banded(s1: str, s2: str, max_distance: int) -> int:
+    """
+    Calculates the Levenshtein distance, evaluating only the diagonal band of width
+    2 * max_distance + 1 and stopping as soon as every cell in a row exceeds the cap.
+
+    Parameters:
+        s1 (str): The first string.
+        s2 (str): The second string.
+        max_distance (int): The cap on the distance.
+
+    Returns:
+        int: The Levenshtein distance, or max_distance + 1 if it exceeds the cap.
+    """
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    n, m = len(s1), len(s2)
+    if n - m > max_distance:
+        return max_distance + 1
+    if m == 0:
+        return n
+
+    over = max_distance + 1
+    width = 2 * max_distance + 1
+    # Cell d of row i holds column j = i + d - max_distance, so a row stores only the band
+    previous_row = [d - max_distance if 0 <= d - max_distance <= m else over for d in range(width)]
+    for i in range(1, n + 1):
+        c1 = s1[i - 1]
+        current_row = [over] * width
+        row_min = over
+        for d in range(max(0, max_distance - i), min(width, m - i + max_distance + 1)):
+            j = i + d - max_distance
+            if j == 0:
+                value = i
+            else:
+                value = previous_row[d] + (c1 != s2[j - 1])
+                if d + 1 < width and previous_row[d + 1] + 1 < value:
+                    value = previous_row[d + 1] + 1
+                if d > 0 and current_row[d - 1] + 1 < value:
+                    value = current_row[d - 1] + 1
+                if value > over:
+                    value = over
+            current_row[d] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return over
+        previous_row = current_row
+
+    return min(previous_row[m - n + max_distance], over)
+
+
+def _cut_point(s1: str, s2: str, position: int, reach: int) -> int:
+    """
+    Chooses where a window boundary of the longer string falls in the shorter one:
+    the proportional position, moved by up to reach characters when the
+    neighbourhood of the boundary clearly matches better there (as after a local
+    insertion or deletion). It depends only on the boundary, so the two windows
+    that share it agree and their stretches tile the shorter string.
+
+    Parameters:
+        s1 (str): The longer string.
+        s2 (str): The shorter string.
+        position (int): The boundary in s1.
+        reach (int): The largest move from the proportional position.
+
+    Returns:
+        int: The boundary in s2.
+    """
+    n, m = len(s1), len(s2)
+    proportional = position * m // n
+    if reach == 0 or position in (0, n):
+        return proportional
+    before = min(position, reach)
+    around = _string_codes(s1[position - before:position + reach]).astype(np.int64)
+    # s2 codes for every candidate offset, padded with -1 (no codepoint) past either end
+    first = proportional - reach - before
+    last = proportional + reach + len(around) - before
+    segment = np.full(last - first, -1, dtype=np.int64)
+    inside = _string_codes(s2[max(0, first):max(0, min(m, last))]).astype(np.int64)
+    segment[max(0, -first):max(0, -first) + inside.size] = inside
+    matches = (np.lib.stride_tricks.sliding_window_view(segment, around.size) == around).sum(axis=1)
+    offsets = np.arange(-reach, reach + 1)
+    if matches.max() - matches[reach] < around.size // 8:
+        return proportional
+    # Among the best offsets, the smallest move wins
+    best = offsets[matches == matches.max()]
+    return min(m, max(0, proportional + int(best[np.argmin(np.abs(best))])))
+
+
+def levenshtein_sampled(s1: str, s2: str, windows: int = 16, width: int = 1024, confidence: float = 0.95,
+                        seed: int = 0, slack: int = None) -> Tuple[float, float, float]:
+    """
+    Estimates the Levenshtein distance from random windows. The longer string is cut
+    into equal windows and each is matched to the proportional stretch of the shorter
+    one. Two distances bound each window's share of the global alignment: its
+    distance to that stretch (the stretches tile the shorter string, so their sum is
+    a valid alignment and can only cost more than the best one), and its semi-global
+    distance to the stretch widened by slack characters on both sides (which can only
+    cost less, as long as the best alignment passes within slack of the proportional
+    cut points). A random subset of windows is compared, and the interval runs from
+    the lower confidence bound of the first sum to the upper confidence bound of the
+    second. The estimate is the upper sum, which leans high by the cost of cutting
+    the alignment at fixed points (under 1% for ciphertexts at the default width);
+    the interval is what to rely on.
+
+    Parameters:
+        s1 (str): The first string.
+        s2 (str): The second string.
+        windows (int): The number of window pairs compared.
+        width (int): The window width in characters of the longer string.
+        confidence (float): The coverage of the returned interval.
+        seed (int): The seed of the window choice, so estimates are reproducible.
+        slack (int): How far the best alignment may stray from the proportional cut
+                     points. Defaults to width // 4.
+
+    Returns:
+        Tuple[float, float, float]: The estimated distance and the lower and upper bound of its
+        confidence interval; all three are exact when every window is compared.
+    """
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    n, m = len(s1), len(s2)
+    total = -(-n // width) if n else 0
+    if total <= windows:
+        distance = float(levenshtein_myers(s1, s2))
+        return distance, distance, distance
+    if slack is None:
+        slack = width // 4
+
+    chosen = np.sort(np.random.default_rng(seed).choice(total, size=windows, replace=False))
+    # Cut points may move by less than half a stretch, so they never cross
+    reach = max(0, min(slack, n // total * m // n // 2 - 1))
+    lower = np.empty(windows)
+    upper = np.empty(windows)
+    for k, window in enumerate(chosen.tolist()):
+        # Equal windows, so every window stands for the same share of the total
+        start, stop = window * n // total, (window + 1) * n // total
+        piece = s1[start:stop]
+        cut_start, cut_stop = _cut_point(s1, s2, start, reach), _cut_point(s1, s2, stop, reach)
+        upper[k] = levenshtein_myers(piece, s2[cut_start:cut_stop])
+        low2, high2 = start * m // n, stop * m // n
+        lower[k] = levenshtein_infix(piece, s2[max(0, low2 - slack):high2 + slack])
+
+    # Normal intervals for the two window means, with the finite population correction
+    z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+    correction = math.sqrt((total - windows) / (total - 1)) / math.sqrt(windows)
+    low = total * (float(lower.mean()) - z * float(lower.std(ddof=1)) * correction)
+    high = total * (float(upper.mean()) + z * float(upper.std(ddof=1)) * correction)
+    low = max(float(n - m), low)
+    high = max(low, min(float(n), high))
+    return min(max(total * float(upper.mean()), low), high), low, high
+
+
+def measure(func: Callable[[], object], warmup: int = 1, trials: int = 5, setup: Callable[[], object] = None,
+            size: int = None, budget_seconds: float = None) -> Dict[str, float]:
+    """
+    Times a function with perf_counter_ns over several trials after some warm-up runs.
+
+    Parameters:
+        func (Callable): The function to time.
+        warmup (int): The number of untimed runs before the trials.
+        trials (int): The maximum number of timed runs.
+        setup (Callable): Optional untimed function called before every run.
+        size (int): Optional input size in bytes, used to report throughput.
+        budget_seconds (float): Optional time budget; trials stop once it is used up
+                                (at least one trial always runs).
+
+    Returns:
+        Dict[str, float]: The trial count and the median, 95th percentile and minimum
+        time in nanoseconds, plus MB/s for the median when size is given.
+    """
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        func()
+
+    samples = []
+    started = time.perf_counter_ns()
+    while len(samples) < max(1, trials):
+        if setup is not None:
+            setup()
+        start = time.perf_counter_ns()
+        func()
+        samples.append(time.perf_counter_ns() - start)
+        if budget_seconds is not None and time.perf_counter_ns() - started > budget_seconds * 1e9:
+            break
+
+    result = {
+        "trials": len(samples),
+        "median_ns": float(np.median(samples)),
+        "p95_ns": float(np.percentile(samples, 95)),
+        "min_ns": float(min(samples)),
+    }
+    if size is not None:
+        result["mb_per_s"] = size / 1e6 / max(result["median_ns"] / 1e9, 1e-12)
+    return result
+
+
+# Constants shared by the statistical metrics
+_PRINTABLE_COUNT = len(set(string.printable))
+_PRINTABLE_PAIRS = len(set(combinations(string.printable, 2)))
+_MAX_ENTROPY = math.log2(_PRINTABLE_COUNT)
+# Largest alphabet * alphabet table used to count distinct bigrams; beyond it np.unique is used
+_BIGRAM_TABLE_LIMIT = 1 << 26
+
+
+def _string_codes(text: str) -> np.ndarray:
+    """
+    Converts a string into an array of Unicode codepoints without copying per character.
+
+    Parameters:
+        text (str): The string to convert.
+
+    Returns:
+        np.ndarray: The codepoints as uint32.
+    """
+    return np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype="<u4")
+
+
+def _unigram_counts(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Counts each distinct codepoint and maps every codepoint to a dense rank.
+
+    Parameters:
+        codes (np.ndarray): The codepoints.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The count of each distinct codepoint (in codepoint
+        order) and the rank of every element of codes in that order.
+    """
+    histogram = np.bincount(codes)
+    present = np.flatnonzero(histogram)
+    lookup = np.zeros(len(histogram), dtype=np.int64)
+    lookup[present] = np.arange(len(present))
+    return histogram[present], lookup[codes]
+
+
+def metric_kernel(original_string: str, encrypted_string: str) -> Dict[str, object]:
+    """
+    Computes, in one vectorized pass over the codepoint arrays, every statistic the
+    character-level Scoring metrics are derived from.
+
+    Parameters:
+        original_string (str): The original string.
+        encrypted_string (str): The encrypted string.
+
+    Returns:
+        Dict[str, object]: The unigram counts of the encrypted string, its number of
+        distinct bigrams, the number of adjacent equal characters in each string and the
+        number of positions where both strings hold the same character.
+    """
+    original = _string_codes(original_string)
+    encrypted = _string_codes(encrypted_string)
+
+    if len(encrypted):
+        counts, ranks = _unigram_counts(encrypted)
+    else:
+        counts, ranks = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    # Each bigram becomes one integer over the dense alphabet
+    alphabet = max(len(counts), 1)
+    pairs = ranks[:-1] * alphabet + ranks[1:]
+    if alphabet * alphabet <= _BIGRAM_TABLE_LIMIT:
+        seen = np.zeros(alphabet * alphabet, dtype=bool)
+        seen[pairs] = True
+        distinct_bigrams = int(np.count_nonzero(seen))
+    else:
+        distinct_bigrams = len(np.unique(pairs))
+
+    overlap = min(len(original), len(encrypted))
+    return {
+        "unigram_counts": counts,
+        "distinct_bigrams": distinct_bigrams,
+        "adjacent_equal_original": int(np.count_nonzero(original[1:] == original[:-1])),
+        "adjacent_equal_encrypted": int(np.count_nonzero(encrypted[1:] == encrypted[:-1])),
+        "positional_matches": int(np.count_nonzero(original[:overlap] == encrypted[:overlap])),
+    }
+
+
+# Cost model of levenshtein_myers(), used to predict whether an exact distance fits a time budget
+_MYERS_NS_PER_WORD = 60
+_MYERS_NS_PER_CHAR = 1000
+
+# Available implementations for Scoring(levenshtein_backend=...)
+LEVENSHTEIN_BACKENDS = {
+    "dp": levenshtein_dp,
+    "myers": levenshtein_myers,
+}
+
+
 class Scoring:
     """
     The Scoring class is responsible for evaluating the effectiveness of the encryption
     method used in the Cipher class. It applies a series of metrics to the encrypted string
     and assigns a score based on these metrics.
+
+    Every metric is evaluated at most once per instance; the values are shared by
+    calculate_score() and generate_summary().
     """
 
-    def __init__(self, cipher: 'Cipher', running_time: float, weights: Dict[str, float], max_length_multiplier: float = 2.0) -> None:
+    # Bump whenever a metric definition changes, so cached values are not reused
+    METRIC_SET_VERSION = 5
+
+    # Metrics that depend on more than the strings and are never cached
+    UNCACHED_METRICS = ("running_time",)
+
+    # Superlinear metrics that can be estimated instead of computed exactly
+    HEAVY_METRICS = ("change_propagation", "normalized_levenshtein")
+
+    # The metrics in evaluation order; each name maps to the <name>_metric method
+    METRIC_NAMES = (
+        "unique_chars",
+        "distinct_sequences",
+        "entropy",
+        "frequency_analysis",
+        "length_consistency",
+        "evenness",
+        "reversibility",
+        "change_propagation",
+        "pattern_analysis",
+        "correlation_analysis",
+        "complexity",
+        "randomness",
+        "normalized_levenshtein",
+        "encryption_consistency",
+        "running_time",
+    )
+
+    def __init__(self, cipher: 'Cipher', running_time: float, weights: Dict[str, float], max_length_multiplier: float = 2.0,
+                 levenshtein_backend: str = "myers", max_levenshtein_distance: int = None,
+                 profile: bool = False, cache: 'ScoreCache' = None,
+                 reference: ReferenceDistributions = None, approximate: bool = False,
+                 time_budget: float = None, random_source: RandomSource = None) -> None:
         """
         The constructor for the Scoring class.
         Parameters:
             cipher (Cipher): An instance of the Cipher class.
-            running_time (float): The time taken to run the encryption.
+            running_time (float): The time taken to run the encryption, ideally the median from measure().
             weights (Dict[str, float]): A dictionary containing the weights for each metric.
             max_length_multiplier (float): The maximum allowed ratio of the length of the encrypted string
                                            to the length of the original string.
+            levenshtein_backend (str): The Levenshtein implementation to use, a key of LEVENSHTEIN_BACKENDS.
+            max_levenshtein_distance (int): Optional cap on Levenshtein distances. When set, Myers stops as
+                                            soon as the cap is certain to be exceeded, the DP backend is
+                                            replaced by the banded algorithm, and larger distances are
+                                            reported as the cap + 1.
+            profile (bool): Record the wall time, call count and input size of every metric and of the
+                            cipher's encrypt()/decrypt() calls, available as profile_report.
+            cache (ScoreCache): Optional persistent cache; metric values already stored for the same
+                                strings are reused and new ones are stored.
+            reference (ReferenceDistributions): The reference distributions randomness_metric looks up.
+                                                Defaults to DEFAULT_REFERENCE.
+            approximate (bool): Estimate the HEAVY_METRICS from sampled windows instead of computing them,
+                                unless max_levenshtein_distance caps them.
+            time_budget (float): Optional budget in seconds for scoring this input; a heavy metric whose
+                                 exact computation is predicted to overrun it is estimated instead.
+            random_source (RandomSource): The source of the ciphers the metrics re-encrypt with, so scoring
+                                          never draws from the scored cipher's own source. Defaults to
+                                          DEFAULT_RANDOM_SOURCE.
         """
+        if levenshtein_backend not in LEVENSHTEIN_BACKENDS:
+            raise ValueError(f"Unknown Levenshtein backend: {levenshtein_backend}")
+        self.levenshtein_backend = levenshtein_backend
+        self.max_levenshtein_distance = max_levenshtein_distance
         self.cipher = cipher
         self.weights = weights
         self.max_length_multiplier = max_length_multiplier
         self.running_time = running_time
-        self.frequency = Counter(self.cipher.encrypted_string)
+        self.reference = reference or DEFAULT_REFERENCE
+        self.approximate = approximate
+        self.time_budget = time_budget
+        self.random_source = random_source or DEFAULT_RANDOM_SOURCE
+        # Confidence bounds of the metrics that were estimated rather than computed
+        self.approximations: Dict[str, Dict[str, float]] = {}
+        self._started = time.perf_counter()
+        self._metric_values: Dict[str, float] = {}
+        self.profile = profile
+        self._timings: Dict[str, Dict[str, float]] = {}
+        # Time spent in nested timed calls, per enclosing call, so each entry is charged only its own work
+        self._nested_ns: List[int] = []
+        self.cache = cache
+        cached = None
+        if cache is not None:
+            self.cache_key = cache.make_key(cipher, max_levenshtein_distance)
+            cached = cache.get(self.cache_key)
+            if cached is not None:
+                self._metric_values.update(cached)
         self.score = self.calculate_score()
         self.summary = self.generate_summary()
+        if cache is not None and cached is None:
+            cache.put(self.cache_key, {name: value for name, value in self.summary.items()
+                                       if name not in self.UNCACHED_METRICS and name not in self.approximations})
+        self.profile_report = self.generate_profile() if profile else None
+
+    # Shared intermediate results, computed on first use
+    @cached_property
+    def decrypted_string(self) -> str:
+        """
+        The decrypted string, shared by the reversibility and Levenshtein metrics.
+        """
+        return self._timed(f"{type(self.cipher).__name__}.decrypt", self.cipher.decrypt,
+                           len(self.cipher.encrypted_string))
+
+    @cached_property
+    def kernel(self) -> Dict[str, object]:
+        """
+        The character statistics of the original and encrypted strings, see metric_kernel().
+        """
+        return self._timed("metric_kernel", partial(metric_kernel, self.cipher.original_string,
+                                                    self.cipher.encrypted_string),
+                           len(self.cipher.encrypted_string))
+
+    @cached_property
+    def probabilities(self) -> np.ndarray:
+        """
+        The relative frequency of each distinct character in the encrypted string.
+        """
+        return self.kernel["unigram_counts"] / len(self.cipher.encrypted_string)
+
+    def clear_cache(self) -> None:
+        """
+        Forgets the memoized metric values and intermediate results, so the next
+        request evaluates them again.
+        """
+        self._metric_values.clear()
+        self.approximations.clear()
+        for name in ("decrypted_string", "kernel", "probabilities"):
+            self.__dict__.pop(name, None)
+
+    def metric(self, name: str) -> float:
+        """
+        Returns the value of a metric, evaluating it only the first time it is requested.
+
+        Parameters:
+            name (str): The metric name, one of METRIC_NAMES.
+
+        Returns:
+            float: The metric value.
+        """
+        if name not in self._metric_values:
+            self._metric_values[name] = self._timed(name, getattr(self, f"{name}_metric"),
+                                                    len(self.cipher.encrypted_string))
+        return self._metric_values[name]
+
+    def _timed(self, name: str, func: Callable[[], object], input_size: int) -> object:
+        """
+        Calls a function, recording its wall time under the given name when profiling is enabled.
+        Time spent in timed calls it makes itself is recorded under their names instead.
 
+        Parameters:
+            name (str): The name to record the call under.
+            func (Callable): The function to call.
+            input_size (int): The size of the input the function works on.
+
+        Returns:
+            object: The return value of the function.
+        """
+        if not self.profile:
+            return func()
+        start = time.perf_counter_ns()
+        self._nested_ns.append(0)
+        try:
+            return func()
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            nested = self._nested_ns.pop()
+            if self._nested_ns:
+                self._nested_ns[-1] += elapsed
+            entry = self._timings.setdefault(name, {"calls": 0, "total_ns": 0, "input_size": 0})
+            entry["calls"] += 1
+            entry["total_ns"] += elapsed - nested
+            entry["input_size"] = max(entry["input_size"], input_size)
 
     # Define metrics
     def unique_chars_metric(self) -> float:
@@ -54,7 +601,7 @@ class Scoring:
         Returns:
             float: The number of unique characters.
         """
-        return len(set(self.cipher.encrypted_string)) / len(set(string.printable))
+        return len(self.kernel["unigram_counts"]) / _PRINTABLE_COUNT
 
     def distinct_sequences_metric(self) -> float:
         """
@@ -63,8 +610,7 @@ class Scoring:
             float: The number of distinct character sequences.
         """
         # Updated to count sequences of two characters
-        sequences = [''.join(seq) for seq in zip(self.cipher.encrypted_string, self.cipher.encrypted_string[1:])]
-        return len(set(sequences)) / max(1, len(set(combinations(string.printable, 2))))
+        return self.kernel["distinct_bigrams"] / max(1, _PRINTABLE_PAIRS)
 
     def entropy_metric(self) -> float:
         """
@@ -72,9 +618,10 @@ class Scoring:
         Returns:
             float: The entropy of the encrypted string.
         """
-        # Updated to use scipy's entropy function for better precision
-        probabilities = [count / len(self.cipher.encrypted_string) for count in self.frequency.values()]
-        return scipy_entropy(probabilities, base=2) / math.log2(len(set(string.printable)))
+        # Shannon entropy in bits, computed with NumPy so SciPy is not needed
+        probabilities = self.probabilities
+        entropy = float(-np.sum(probabilities * np.log2(probabilities)))
+        return entropy / _MAX_ENTROPY
 
     def frequency_analysis_metric(self) -> float:
         """
@@ -82,7 +629,7 @@ class Scoring:
         Returns:
             float: The result of a frequency analysis on the encrypted string.
         """
-        most_common_char_frequency = self.frequency.most_common(1)[0][1] / len(self.cipher.encrypted_string)
+        most_common_char_frequency = int(self.kernel["unigram_counts"].max()) / len(self.cipher.encrypted_string)
         return 1 - most_common_char_frequency
 
     def length_consistency_metric(self) -> float:
@@ -99,10 +646,7 @@ class Scoring:
         Returns:
             float: The standard deviation of the character frequencies.
         """
-        frequencies = list(self.frequency.values())
-        mean_freq = sum(frequencies) / len(frequencies)
-        variance = sum((freq - mean_freq) ** 2 for freq in frequencies) / len(frequencies)
-        return 1 - (math.sqrt(variance) / len(self.cipher.encrypted_string))
+        return 1 - (float(self.kernel["unigram_counts"].std()) / len(self.cipher.encrypted_string))
 
     def reversibility_metric(self) -> float:
         """
@@ -110,8 +654,7 @@ class Scoring:
         Returns:
             float: 1.0 if the decrypted string matches the original string, 0.0 otherwise.
         """
-        decrypted_string = self.cipher.decrypt()
-        return float(decrypted_string == self.cipher.original_string)
+        return float(self.decrypted_string == self.cipher.original_string)
 
     def change_propagation_metric(self) -> float:
         """
@@ -120,18 +663,23 @@ class Scoring:
         Returns:
             float: The measure of change propagation.
         """
-        # Change the original string
-        changed_string = 'a' + self.cipher.original_string[1:]
+        # Change the original string; 'b' when it already starts with 'a', which would change nothing
+        original_string = self.cipher.original_string
+        changed_string = ('b' if original_string[:1] == 'a' else 'a') + original_string[1:]
 
-        # Create a new Cipher instance with the changed string and encrypt it
-        cipher_changed = Cipher(changed_string)
-        cipher_changed.encrypt()
+        # Create a new cipher of the same kind with the changed string and encrypt it
+        cipher_changed = self._new_cipher(changed_string)
+        self._timed(f"{type(cipher_changed).__name__}.encrypt", cipher_changed.encrypt, len(changed_string))
         changed_encrypted_string = cipher_changed.encrypted_string
 
         # Calculate the Levenshtein distance
-        levenshtein_distance = self._levenshtein_distance(self.cipher.encrypted_string, changed_encrypted_string)
+        levenshtein_distance, bounds = self._levenshtein_estimate(self.cipher.encrypted_string,
+                                                                  changed_encrypted_string)
+        length = len(self.cipher.encrypted_string)
+        if bounds is not None:
+            self.approximations["change_propagation"] = {"low": bounds[0] / length, "high": bounds[1] / length}
 
-        return levenshtein_distance / len(self.cipher.encrypted_string)
+        return levenshtein_distance / length
 
     def pattern_analysis_metric(self) -> float:
         """
@@ -139,8 +687,8 @@ class Scoring:
         Returns:
             float: The measure of pattern preservation.
         """
-        pattern_instances_orig = sum(1 for a, b in zip(self.cipher.original_string, self.cipher.original_string[1:]) if a == b)
-        pattern_instances_enc = sum(1 for a, b in zip(self.cipher.encrypted_string, self.cipher.encrypted_string[1:]) if a == b)
+        pattern_instances_orig = self.kernel["adjacent_equal_original"]
+        pattern_instances_enc = self.kernel["adjacent_equal_encrypted"]
 
         if pattern_instances_orig == 0:
             return 1.0  # No repeated patterns in the original string
@@ -157,7 +705,7 @@ class Scoring:
         Returns:
             float: The average correlation for all positions.
         """
-        correlations = sum(1 for a, b in zip(self.cipher.original_string, self.cipher.encrypted_string) if a == b)
+        correlations = self.kernel["positional_matches"]
         correlation_metric = correlations / len(self.cipher.original_string)
         return 1 - correlation_metric
 
@@ -173,17 +721,13 @@ class Scoring:
         """
         Evaluates how random the encrypted string appears.
         Returns:
-            float: The standard deviation of the character frequencies in the encrypted string of a random string.
+            float: The expected standard deviation of the character frequencies in the encrypted string of a
+                   random string of the same length, from the reference distributions. Like the original
+                   single-sample estimate, it describes the cipher kind at this length rather than this
+                   ciphertext; placing the ciphertext's own spread in the distribution would score the
+                   plaintext's letter statistics instead.
         """
-        random_string = ''.join(random.choice(string.printable) for _ in range(len(self.cipher.original_string)))
-        cipher = Cipher(random_string)
-        cipher.encrypt()
-        random_encrypted_string = cipher.encrypted_string
-        random_encrypted_frequency = Counter(random_encrypted_string)
-        frequencies = list(random_encrypted_frequency.values())
-        mean_freq = sum(frequencies) / len(frequencies)
-        variance = sum((freq - mean_freq) ** 2 for freq in frequencies) / len(frequencies)
-        return math.sqrt(variance) / len(string.printable)
+        return self.reference.distribution(self.cipher, len(self.cipher.original_string))["mean"]
 
     def normalized_levenshtein_metric(self) -> float:
         """
@@ -191,9 +735,13 @@ class Scoring:
         Returns:
             float: The normalized Levenshtein distance.
         """
-        decrypted_string = self.cipher.decrypt()
-        distance = self._levenshtein_distance(self.cipher.original_string, decrypted_string)
-        return 1 - distance / max(len(self.cipher.original_string), len(decrypted_string))
+        decrypted_string = self.decrypted_string
+        distance, bounds = self._levenshtein_estimate(self.cipher.original_string, decrypted_string)
+        longest = max(len(self.cipher.original_string), len(decrypted_string))
+        if bounds is not None:
+            self.approximations["normalized_levenshtein"] = {"low": 1 - bounds[1] / longest,
+                                                             "high": 1 - bounds[0] / longest}
+        return 1 - distance / longest
 
     def encryption_consistency_metric(self) -> float:
         """
@@ -202,17 +750,10 @@ class Scoring:
             float: The consistency of the encryption method.
         """
         original_string = self.cipher.original_string
-        original_encrypted_string = self.cipher.encrypted_string
-
-        self.cipher.original_string = original_string
-        self.cipher.encrypted_string = ""
-        self.cipher.encrypt()
-        second_encryption = self.cipher.encrypted_string
-
-        # Reset the encrypted_string back to its original value
-        self.cipher.encrypted_string = original_encrypted_string
+        second_cipher = self._new_cipher(original_string)
+        self._timed(f"{type(self.cipher).__name__}.encrypt", second_cipher.encrypt, len(original_string))
 
-        return float(original_encrypted_string == second_encryption)
+        return float(self.cipher.encrypted_string == second_cipher.encrypted_string)
 
     def running_time_metric(self) -> float:
         """
@@ -236,30 +777,35 @@ class Scoring:
             if len(self.cipher.encrypted_string) > len(self.cipher.original_string) * self.max_length_multiplier:
                 raise Exception("The length of the encrypted string exceeds the allowed limit. This entry is disqualified.")
 
-            total_score += self.weights["unique_chars"] * self.unique_chars_metric()
-            total_score += self.weights["distinct_sequences"] * self.distinct_sequences_metric()
-            total_score += self.weights["entropy"] * self.entropy_metric()
-            total_score += self.weights["frequency_analysis"] * self.frequency_analysis_metric()
-            total_score += self.weights["length_consistency"] * self.length_consistency_metric()
-            total_score += self.weights["evenness"] * self.evenness_metric()
-            total_score += self.weights["reversibility"] * self.reversibility_metric()
-            total_score += self.weights["change_propagation"] * self.change_propagation_metric()
-            total_score += self.weights["pattern_analysis"] * self.pattern_analysis_metric()
-            total_score += self.weights["correlation_analysis"] * self.correlation_analysis_metric()
-            total_score += self.weights["complexity"] * self.complexity_metric()
-            total_score += self.weights["randomness"] * self.randomness_metric()
-            total_score += self.weights["normalized_levenshtein"] * self.normalized_levenshtein_metric()
-            total_score += self.weights["encryption_consistency"] * self.encryption_consistency_metric()
-            total_score += self.weights["running_time"] * self.running_time_metric()
+            for name in self.METRIC_NAMES:
+                total_score += self.weights[name] * self.metric(name)
         except Exception as e:
             print(f"An error occurred while calculating the score: {e}")
             return 0
 
         return total_score
 
+    def _new_cipher(self, original_string: str) -> 'Cipher':
+        """
+        Creates a fresh cipher of the same kind (and with the same key, if any) as the
+        one being scored, drawing from this Scoring's random source rather than the
+        scored cipher's.
+
+        Parameters:
+            original_string (str): The string for the new cipher.
+
+        Returns:
+            Cipher: The new, not yet encrypted, cipher.
+        """
+        cipher = copy.copy(self.cipher)
+        cipher.random_source = self.random_source
+        cipher.original_string = original_string
+        cipher.encrypted_string = ""
+        return cipher
+
     def _levenshtein_distance(self, s1: str, s2: str) -> int:
         """
-        Calculates the Levenshtein distance between two strings.
+        Calculates the Levenshtein distance between two strings with the configured backend.
 
         Parameters:
             s1 (str): The first string.
@@ -268,25 +814,59 @@ class Scoring:
         Returns:
             int: The Levenshtein distance between the two strings.
         """
-        if len(s1) < len(s2):
-            return self._levenshtein_distance(s2, s1)
+        # Identical strings are the common case for the decrypted string
+        if s1 == s2:
+            return 0
+        cap = self.max_levenshtein_distance
+        if cap is None:
+            return LEVENSHTEIN_BACKENDS[self.levenshtein_backend](s1, s2)
+        # Myers stops early on its own; the DP is replaced by its banded form
+        if self.levenshtein_backend == "myers":
+            return levenshtein_myers(s1, s2, cap)
+        return levenshtein_banded(s1, s2, cap)
+
+
+    def _levenshtein_estimate(self, s1: str, s2: str) -> Tuple[float, Tuple[float, float]]:
+        """
+        Calculates the Levenshtein distance exactly, or estimates it from sampled windows
+        in approximate mode or when the exact computation would overrun the time budget.
+
+        Parameters:
+            s1 (str): The first string.
+            s2 (str): The second string.
 
-        # len(s1) >= len(s2)
-        if len(s2) == 0:
-            return len(s1)
+        Returns:
+            Tuple[float, Tuple[float, float]]: The distance and, when it was estimated, the
+            bounds of its confidence interval (None when it is exact).
+        """
+        if s1 == s2 or not self._should_approximate(s1, s2):
+            return self._levenshtein_distance(s1, s2), None
+        estimate, low, high = levenshtein_sampled(s1, s2)
+        # Short strings are compared in full, which is exact
+        return estimate, None if low == high else (low, high)
 
-        previous_row = range(len(s2) + 1)
-        for i, c1 in enumerate(s1):
-            current_row = [i + 1]
-            for j, c2 in enumerate(s2):
-                insertions = previous_row[j + 1] + 1
-                deletions = current_row[j] + 1
-                substitutions = previous_row[j] + (c1 != c2)
-                current_row.append(min(insertions, deletions, substitutions))
-            previous_row = current_row
+    def _should_approximate(self, s1: str, s2: str) -> bool:
+        """
+        Decides whether a Levenshtein distance is estimated rather than computed.
 
-        return previous_row[-1]
+        Parameters:
+            s1 (str): The first string.
+            s2 (str): The second string.
 
+        Returns:
+            bool: True in approximate mode, or if the predicted cost of the exact distance
+            does not fit in what is left of the time budget. Never under a distance cap: the
+            capped distance is cheap, and an uncapped estimate would be on another scale.
+        """
+        if self.max_levenshtein_distance is not None:
+            return False
+        if self.approximate:
+            return True
+        if self.time_budget is None:
+            return False
+        n, m = max(len(s1), len(s2)), min(len(s1), len(s2))
+        predicted = (n * -(-m // 64) * _MYERS_NS_PER_WORD + n * _MYERS_NS_PER_CHAR) / 1e9
+        return time.perf_counter() - self._started + predicted > self.time_budget
 
     def generate_summary(self) -> Dict[str, float]:
         """
@@ -294,27 +874,66 @@ class Scoring:
         Returns:
             Dict[str, float]: A dictionary containing the metric names and their values.
         """
-        summary = {
-            "unique_chars": self.unique_chars_metric(),
-            "distinct_sequences": self.distinct_sequences_metric(),
-            "entropy": self.entropy_metric(),
-            "frequency_analysis": self.frequency_analysis_metric(),
-            "length_consistency": self.length_consistency_metric(),
-            "evenness": self.evenness_metric(),
-            "reversibility": self.reversibility_metric(),
-            "change_propagation": self.change_propagation_metric(),
-            "pattern_analysis": self.pattern_analysis_metric(),
-            "correlation_analysis": self.correlation_analysis_metric(),
-            "complexity": self.complexity_metric(),
-            "randomness": self.randomness_metric(),
-            "normalized_levenshtein": self.normalized_levenshtein_metric(),
-            "encryption_consistency": self.encryption_consistency_metric(),
-            "running_time": self.running_time_metric()  # New metric
-        }
+        summary = {name: self.metric(name) for name in self.METRIC_NAMES}
         return summary
 
+    def metric_modes(self) -> Dict[str, str]:
+        """
+        Reports how each metric in the summary was obtained.
+        Returns:
+            Dict[str, str]: "approximate" for the metrics estimated by sampling (their bounds
+            are in approximations), "exact" for the others.
+        """
+        return {name: "approximate" if name in self.approximations else "exact" for name in self.METRIC_NAMES}
+
+    def generate_profile(self) -> Dict[str, Dict[str, float]]:
+        """
+        Generates the timing breakdown recorded while profiling. Metric times exclude the
+        cipher calls and the shared metric_kernel pass they trigger, which are listed separately.
+        Returns:
+            Dict[str, Dict[str, float]]: For each metric or cipher call, its call count,
+            total wall time in seconds and largest input size.
+        """
+        return {
+            name: {
+                "calls": entry["calls"],
+                "wall_time": entry["total_ns"] / 1e9,
+                "input_size": entry["input_size"],
+            }
+            for name, entry in self._timings.items()
+        }
+
+    @staticmethod
+    def print_profile(report: Dict[str, Dict[str, float]]) -> None:
+        """
+        Prints a profile report in a table format, slowest entries first.
+
+        Parameters:
+            report (Dict[str, Dict[str, float]]): A report from generate_profile().
+        """
+        from prettytable import PrettyTable
+
+        table = PrettyTable()
+        table.field_names = ["Name", "Calls", "Wall Time (ms)", "Mean (ms)", "Input Size"]
+        for name, entry in sorted(report.items(), key=lambda item: item[1]["wall_time"], reverse=True):
+            table.add_row([name, entry["calls"], f"{entry['wall_time'] * 1e3:.4f}",
+                           f"{entry['wall_time'] * 1e3 / entry['calls']:.4f}", entry["input_size"]])
+        print(table)
+
+    @staticmethod
+    def export_profile(report: Dict[str, Dict[str, float]], path: str) -> None:
+        """
+        Writes a profile report to a JSON file.
+
+        Parameters:
+            report (Dict[str, Dict[str, float]]): A report from generate_profile().
+            path (str): The file to write.
+        """
+        with open(path, "w") as file:
+            json.dump(report, file, indent=2)
+
     @staticmethod
-    def print_results(table_data: List[List[str]], scores: List[float]) -> None:
+    def print_results(table_data: List[List[str]], scores: List[float], max_width: int = None) -> None:
         """
         Prints the results of the encryption tests in a table format.
 
@@ -322,7 +941,10 @@ class Scoring:
             table_data (list): A list of lists where each sublist contains the test number, original string,
                               encrypted string, decrypted string, decryption success, score, and running time.
             scores (list): A list of all scores.
+            max_width (int): Optional maximum width of string cells; longer strings are truncated.
         """
+        from prettytable import PrettyTable
+
         try:
             # Create a PrettyTable instance
             table = PrettyTable()
@@ -333,6 +955,9 @@ class Scoring:
 
             # Add each test's results to the table
             for data in table_data:
+                if max_width is not None:
+                    data = [cell[:max_width - 3] + "..." if isinstance(cell, str) and len(cell) > max_width else cell
+                            for cell in data]
                 table.add_row(data)
 
             # Print the table
@@ -343,175 +968,1540 @@ class Scoring:
         except Exception as e:
             print(f"An error occurred while printing the results: {e}")
 
-     
-
 
-class Cipher:
+class StreamingScoring:
     """
-    The Cipher class handles the encryption and decryption of strings using a custom
-    cipher.
-
-    Attributes:
-        original_string (str): The original string that will be encrypted.
-        encrypted_string (str): The encrypted string after encryption.
+    The StreamingScoring class evaluates the character-level metrics of a ciphertext
+    that arrives in chunks, e.g. from streaming.encrypt_stream(). It keeps running
+    counts instead of the text, so memory stays bounded by the alphabet size, and a
+    generate_summary()-compatible dict can be produced at any point.
+
+    Metrics that need the whole ciphertext (reversibility, change_propagation,
+    randomness, normalized_levenshtein, encryption_consistency) are reported as NaN
+    and left out of the score. For correlation_analysis, the characters of whichever
+    stream runs ahead are buffered until the other stream catches up; once one runs
+    more than max_pending characters ahead, the match rate seen so far is extrapolated.
     """
 
-    def __init__(self, original_string: str) -> None:
-        """
-        The constructor for the Cipher class.
+    # Codepoint pairs are packed into one integer as first * _PAIR_BASE + second
+    _PAIR_BASE = sys.maxunicode + 1
 
+    def __init__(self, weights: Dict[str, float], running_time: float = None, max_pending: int = 1 << 20) -> None:
+        """
+        The constructor for the StreamingScoring class.
         Parameters:
-            original_string (str): The original string that will be encrypted.
+            weights (Dict[str, float]): A dictionary containing the weights for each metric.
+            running_time (float): Optional time taken to run the encryption, for running_time_metric.
+            max_pending (int): The largest number of characters buffered to line up the two streams.
         """
-        self.original_string = original_string
-        self.encrypted_string = ""
+        self.weights = weights
+        self.running_time = running_time
+        self.max_pending = max_pending
+        self.encrypted_length = 0
+        self.original_length = 0
+        self._counts = np.zeros(0, dtype=np.int64)
+        # Distinct bigrams: a rank * rank table of the codepoints seen, or a set of packed
+        # rank pairs once the alphabet outgrows _BIGRAM_TABLE_LIMIT
+        self._ranks = np.zeros(0, dtype=np.int64)
+        self._alphabet = 0
+        self._bigram_table = np.zeros((0, 0), dtype=bool)
+        self._bigram_set = None
+        self._last_encrypted = None
+        self._last_original = None
+        self._adjacent_equal_encrypted = 0
+        self._adjacent_equal_original = 0
+        self._positional_matches = 0
+        self._compared_positions = 0
+        self._aligned = True
+        # Characters of one stream not yet lined up with the other, for the positional matches
+        self._pending_encrypted = np.zeros(0, dtype="<u4")
+        self._pending_original = np.zeros(0, dtype="<u4")
+
+    def update(self, encrypted_chunk: str, original_chunk: str = "") -> None:
+        """
+        Adds the next chunk of the ciphertext and, optionally, of the plaintext.
 
-    def encrypt(self) -> None:
+        Parameters:
+            encrypted_chunk (str): The next part of the encrypted string.
+            original_chunk (str): The next part of the original string.
         """
-        Encrypts the original string by swapping each character with a character a fixed
-        number of places down the alphabet.
+        if encrypted_chunk:
+            codes = _string_codes(encrypted_chunk)
+            histogram = np.bincount(codes, minlength=len(self._counts))
+            histogram[:len(self._counts)] += self._counts
+            self._counts = histogram
+
+            # Bigrams and repeats that straddle the chunk boundary count too
+            joined = codes if self._last_encrypted is None else np.concatenate(([self._last_encrypted], codes))
+            self._add_bigrams(joined)
+            self._adjacent_equal_encrypted += int(np.count_nonzero(joined[1:] == joined[:-1]))
+            self._last_encrypted = codes[-1]
+            self.encrypted_length += len(codes)
+            if self._aligned:
+                self._pending_encrypted = np.concatenate((self._pending_encrypted, codes))
+
+        if original_chunk:
+            codes = _string_codes(original_chunk)
+            joined = codes if self._last_original is None else np.concatenate(([self._last_original], codes))
+            self._adjacent_equal_original += int(np.count_nonzero(joined[1:] == joined[:-1]))
+            self._last_original = codes[-1]
+            self.original_length += len(codes)
+            if self._aligned:
+                self._pending_original = np.concatenate((self._pending_original, codes))
+
+        overlap = min(len(self._pending_encrypted), len(self._pending_original))
+        if overlap:
+            self._positional_matches += int(np.count_nonzero(
+                self._pending_encrypted[:overlap] == self._pending_original[:overlap]))
+            self._compared_positions += overlap
+            self._pending_encrypted = self._pending_encrypted[overlap:]
+            self._pending_original = self._pending_original[overlap:]
+        if max(len(self._pending_encrypted), len(self._pending_original)) > self.max_pending:
+            # Stop lining up the streams rather than buffer without bound
+            self._aligned = False
+            self._pending_encrypted = self._pending_encrypted[:0]
+            self._pending_original = self._pending_original[:0]
+
+    def _add_bigrams(self, codes: np.ndarray) -> None:
+        """
+        Marks the bigrams of a run of codepoints as seen. Each chunk costs time in its own
+        length only, never in the number of distinct bigrams seen before.
+
+        Parameters:
+            codes (np.ndarray): The codepoints, including the last one of the previous chunk.
         """
-        # Encrypt the string
-        # self.encrypted_string = self.original_string[::-1]
-
-        word=self.original_string
-
-        word=word[::-1]
-        ascii_word=""
-        r1=random.randint(0,7)
-        add_ascii_word=""
-        for i in word:
-          ascii_word+=chr((ord(i))-r1)
-        add_ascii_word=ascii_word[0]
-        for i in ascii_word[1:]:
-          # r=chr(random.randint(ord("!"),ord("~")))
-          add_ascii_word =add_ascii_word + i+ chr(random.randint(ord("!"),ord("য")))
-
-        t=(str(r1+2)+add_ascii_word)
-        if len(t)==((len(word))*2)-1:
-                  self.encrypted_string=t+"A"
+        top = int(codes.max())
+        if top >= len(self._ranks):
+            self._ranks = np.concatenate((self._ranks, np.full(top + 1 - len(self._ranks), -1, dtype=np.int64)))
+        ranks = self._ranks[codes]
+        unseen = np.unique(codes[ranks < 0])
+        if len(unseen):
+            self._ranks[unseen] = np.arange(self._alphabet, self._alphabet + len(unseen))
+            self._alphabet += len(unseen)
+            ranks = self._ranks[codes]
+        first, second = ranks[:-1], ranks[1:]
+
+        size = len(self._bigram_table)
+        if self._bigram_set is None and self._alphabet > size:
+            size = max(self._alphabet, 2 * size)
+            if size * size <= _BIGRAM_TABLE_LIMIT:
+                table = np.zeros((size, size), dtype=bool)
+                table[:len(self._bigram_table), :len(self._bigram_table)] = self._bigram_table
+                self._bigram_table = table
+            else:
+                seen = np.nonzero(self._bigram_table)
+                self._bigram_set = set((seen[0] * self._PAIR_BASE + seen[1]).tolist())
+                self._bigram_table = np.zeros((0, 0), dtype=bool)
+        if self._bigram_set is None:
+            self._bigram_table[first, second] = True
         else:
-          self.encrypted_string=t
-    import random
-    def decrypt(self) -> str:
+            self._bigram_set.update(np.unique(first * self._PAIR_BASE + second).tolist())
+
+    def generate_summary(self) -> Dict[str, float]:
         """
-        Decrypts the encrypted string by swapping each character with a character a fixed
-        number of places up the alphabet.
+        Generates a summary of the metrics for the data seen so far.
+        Returns:
+            Dict[str, float]: A dictionary containing the metric names and their values,
+            with NaN for the metrics that cannot be computed from a stream.
+        """
+        summary = dict.fromkeys(Scoring.METRIC_NAMES, math.nan)
+        n = self.encrypted_length
+        if n:
+            counts = self._counts[self._counts > 0]
+            probabilities = counts / n
+            summary["unique_chars"] = len(counts) / _PRINTABLE_COUNT
+            bigrams = len(self._bigram_set) if self._bigram_set is not None else np.count_nonzero(self._bigram_table)
+            summary["distinct_sequences"] = bigrams / max(1, _PRINTABLE_PAIRS)
+            summary["entropy"] = float(-np.sum(probabilities * np.log2(probabilities))) / _MAX_ENTROPY
+            summary["frequency_analysis"] = 1 - int(counts.max()) / n
+            summary["evenness"] = 1 - float(counts.std()) / n
+        if self.original_length:
+            summary["length_consistency"] = abs(n - self.original_length) / self.original_length
+            summary["complexity"] = n / self.original_length
+            if self._adjacent_equal_original == 0 or self._adjacent_equal_encrypted == 0:
+                summary["pattern_analysis"] = 1.0
+            else:
+                summary["pattern_analysis"] = 1 - self._adjacent_equal_encrypted / self._adjacent_equal_original
+            matches = self._positional_matches
+            overlap = min(n, self.original_length)
+            if self._compared_positions < overlap:
+                matches *= overlap / max(1, self._compared_positions)
+            summary["correlation_analysis"] = 1 - matches / self.original_length
+        if self.running_time is not None:
+            summary["running_time"] = float(np.clip(1 - self.running_time, 0, 1))
+        return summary
+
+    def calculate_score(self) -> float:
+        """
+        Calculates the weighted score over the metrics that are available so far.
 
         Returns:
-            str: The decrypted string.
+            float: The total score.
         """
-        # Decrypt the string
-        # return self.encrypted_string[::-1]
+        summary = self.generate_summary()
+        return sum(self.weights[name] * value for name, value in summary.items() if not math.isnan(value))
 
-        encrypted_text = self.encrypted_string
-        if len(encrypted_text)%2==0:
-          encrypted_text = encrypted_text [0:len(encrypted_text)-1]
-        else:
-          encrypted_text=encrypted_text
 
-        r1 = (int(encrypted_text[:1]))-2
+class ScoreCache:
+    """
+    The ScoreCache class is a persistent, content-addressed store of metric values,
+    backed by SQLite. Entries are keyed by a hash of the cipher kind, the original
+    string, the encrypted string and the metric-set version, and each metric value
+    is stored separately so changing the weights does not invalidate anything.
+    The least recently used entries are evicted beyond max_entries, in batches of
+    EVICTION_FRACTION of the capacity. The number of entries is kept up to date by
+    triggers, so no insert has to count the table.
 
-        ex=encrypted_text[1:2]
-        encrypted_pairs = encrypted_text[2:]
-        a=""
-        b=""
-        encrypted_pair=list(encrypted_pairs)
-        for i in range(0,len(encrypted_pair),2):
-            a=a+encrypted_pair[i]
-        c=ex+a
-        for i in c:
-          b+=chr((ord(i))+r1)
-        b=b[::-1]
-        return b
+    Attributes:
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups that were not.
+        evictions (int): The number of entries evicted by this instance.
+    """
 
-     
+    # Share of max_entries freed at once when the cache overflows
+    EVICTION_FRACTION = 0.01
 
+    def __init__(self, path: str, max_entries: int = 1_000_000) -> None:
+        """
+        The constructor for the ScoreCache class.
 
-def main(max_length_multiplier: float):
-    """
-    The main function that tests the Cipher and Scoring classes.
+        Parameters:
+            path (str): The SQLite database file; it is created if it does not exist.
+            max_entries (int): The maximum number of scored inputs kept.
+        """
+        import sqlite3
+
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Several worker processes may share the file
+        self._connection = sqlite3.connect(path, timeout=30.0)
+        with self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, last_used INTEGER NOT NULL)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+            # Running entry count, shared by every process using the file
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._connection.execute(
+                "INSERT OR IGNORE INTO counters (name, value) VALUES ('entries', (SELECT COUNT(*) FROM entries))")
+            self._connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS entries_inserted AFTER INSERT ON entries "
+                "BEGIN UPDATE counters SET value = value + 1 WHERE name = 'entries'; END")
+            self._connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS entries_deleted AFTER DELETE ON entries "
+                "BEGIN UPDATE counters SET value = value - 1 WHERE name = 'entries'; END")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS metrics (key TEXT NOT NULL, metric TEXT NOT NULL, value REAL NOT NULL, "
+                "PRIMARY KEY (key, metric)) WITHOUT ROWID")
 
-    Parameters:
-        max_length_multiplier (float): The maximum allowed ratio of the length of the encrypted string
-                                       to the length of the original string.
-    """
-    # Ensure the maximum length multiplier is a positive number
-    assert max_length_multiplier > 0, "Maximum length multiplier must be a positive number"
-
-    # Define the sample strings
-    sample_strings = [
-        "Hello, World!",
-        "This is a sample string",
-        "Another string for testing",
-        "A very very long string that should result in a high score",
-        "Short string",
-        "abcdefghijklmnopqrstuvwxyz",
-        "ABCDEFGHIJKLMNOPQRSTUVWXYZ",
-        "1234567890",
-        "A string with special characters: !@#$%^&*()",
-        "A string with spaces    between     words",
-        "A string with a mix of letters, numbers, and special characters: abc123!@#"
-    ]
-
-
-    # Define the weights for each metric
-    weights = {
-        "unique_chars": 0.1,
-        "distinct_sequences": 1.0,
-        "entropy": 1.5,
-        "frequency_analysis": 0.1,
-        "length_consistency": 0.5,
-        "evenness": 1.2,
-        "reversibility": 2.0,
-        "change_propagation": 1.5,
-        "pattern_analysis": 1.5,
-        "correlation_analysis": 1.5,
-        "complexity": 1.0,
-        "randomness": 1.5,
-        "normalized_levenshtein": 1.0,
-        "encryption_consistency": 2.0,  # High weight as this is critical
-        "running_time": 0.5
-    }
+    @staticmethod
+    def make_key(cipher: 'Cipher', max_levenshtein_distance: int = None) -> str:
+        """
+        Computes the content address of a cipher's metric values.
 
+        Parameters:
+            cipher (Cipher): The cipher, with its original and encrypted strings.
+            max_levenshtein_distance (int): The Levenshtein cap the metrics are computed with.
 
-    print("\n********** Cipher Testing **********")
-    scores = []
-    table_data = []
+        Returns:
+            str: The hex digest used as the cache key.
+        """
+        digest = hashlib.sha256()
+        for part in (str(Scoring.METRIC_SET_VERSION), type(cipher).__name__, str(max_levenshtein_distance),
+                     cipher.original_string, cipher.encrypted_string):
+            data = part.encode("utf-8", "surrogatepass")
+            # Length prefixes keep the concatenation unambiguous
+            digest.update(len(data).to_bytes(8, "big"))
+            digest.update(data)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Dict[str, float]:
+        """
+        Looks up the metric values stored under a key and marks the entry as used.
 
-    for i, original_string in enumerate(sample_strings, start=1):
-        # Create a Cipher instance and encrypt the string
-        cipher = Cipher(original_string)
+        Parameters:
+            key (str): The cache key.
 
-        # Start the timer
-        start_time = time.time()
+        Returns:
+            Dict[str, float]: The stored metric values, or None on a miss.
+        """
+        with self._connection:
+            updated = self._connection.execute(
+                "UPDATE entries SET last_used = ? WHERE key = ?", (time.time_ns(), key)).rowcount
+            rows = self._connection.execute("SELECT metric, value FROM metrics WHERE key = ?", (key,)).fetchall()
+        if not updated:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(rows)
+
+    def put(self, key: str, values: Dict[str, float]) -> None:
+        """
+        Stores metric values under a key, evicting the least recently used entries
+        if the cache grows beyond max_entries.
 
-        cipher.encrypt()
+        Parameters:
+            key (str): The cache key.
+            values (Dict[str, float]): The metric values.
+        """
+        with self._connection:
+            # An upsert, unlike INSERT OR REPLACE, fires the insert trigger only for new keys
+            self._connection.execute(
+                "INSERT INTO entries (key, last_used) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET last_used = excluded.last_used", (key, time.time_ns()))
+            self._connection.executemany("INSERT OR REPLACE INTO metrics (key, metric, value) VALUES (?, ?, ?)",
+                                         [(key, name, float(value)) for name, value in values.items()])
+            excess = self._entries() - self.max_entries
+            if excess > 0:
+                excess = max(excess, int(self.max_entries * self.EVICTION_FRACTION))
+                stale = self._connection.execute(
+                    "SELECT key FROM entries ORDER BY last_used LIMIT ?", (excess,)).fetchall()
+                self._connection.executemany("DELETE FROM metrics WHERE key = ?", stale)
+                self._connection.executemany("DELETE FROM entries WHERE key = ?", stale)
+                self.evictions += len(stale)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Reports the cache counters.
 
-        # End the timer
-        end_time = time.time()
+        Returns:
+            Dict[str, int]: The hits, misses and evictions of this instance and the number of stored entries.
+        """
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "entries": self._entries()}
 
-        # Calculate the running time
-        running_time = end_time - start_time
+    def _entries(self) -> int:
+        """
+        Reads the running number of stored entries.
 
-        # Create a Scoring instance and calculate the score
-        scoring = Scoring(cipher, running_time, weights, max_length_multiplier)
-        scores.append(scoring.score)
+        Returns:
+            int: The number of entries.
+        """
+        return self._connection.execute("SELECT value FROM counters WHERE name = 'entries'").fetchone()[0]
 
-        # Decrypt the string and verify it's the same as the original
-        decrypted_string = cipher.decrypt()
-        decryption_success = decrypted_string == original_string
+    def close(self) -> None:
+        """
+        Closes the database connection.
+        """
+        self._connection.close()
 
-        # Add the results to the table data
-        table_data.append([
-            i, original_string, cipher.encrypted_string,
-            decrypted_string, decryption_success, scoring.score, running_time
-        ])
 
-    Scoring.print_results(table_data, scores)
-    print("\n********** Testing Complete **********\n")
+@lru_cache(maxsize=None)
+def open_score_cache(path: str) -> ScoreCache:
+    """
+    Opens a score cache once per process, so batches handled by the same worker share
+    one connection.
 
-if __name__ == "__main__":
+    Parameters:
+        path (str): The SQLite database file.
+
+    Returns:
+        ScoreCache: The cache.
+    """
+    return ScoreCache(path)
+
+
+def frequency_spreads(codes: np.ndarray) -> np.ndarray:
+    """
+    Computes, for every row of a codepoint matrix, the standard deviation of the
+    counts of its distinct characters, as randomness_metric does for one string.
+
+    Parameters:
+        codes (np.ndarray): A (strings, length) matrix of codepoints.
+
+    Returns:
+        np.ndarray: One standard deviation per row.
+    """
+    rows, width = codes.shape
+    ordered = np.sort(codes, axis=1)
+    change = np.ones(ordered.shape, dtype=bool)
+    change[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    # Every run of equal values in a sorted row is one distinct character
+    starts = np.flatnonzero(change.ravel())
+    counts = np.diff(np.append(starts, ordered.size)).astype(float)
+    row = starts // width
+    distinct = np.bincount(row, minlength=rows)
+    mean = np.bincount(row, weights=counts, minlength=rows) / distinct
+    square = np.bincount(row, weights=counts * counts, minlength=rows) / distinct
+    return np.sqrt(np.maximum(square - mean * mean, 0.0))
+
+
+class ReferenceDistributions:
+    """
+    The ReferenceDistributions class holds Monte-Carlo reference distributions of
+    the randomness statistic: the spread of the character frequencies in the
+    encryption of a random printable string, per cipher kind and input length.
+
+    Each distribution is computed once from many random strings encrypted in one
+    batch, then kept in memory and, when a path is given, in a JSON file. Lengths up
+    to EXACT_LENGTHS have their own distribution; longer ones are interpolated
+    between geometrically spaced lengths, so a lookup costs O(1) after warm-up.
+    Lengths beyond MAX_LENGTH are extrapolated from the longest computed ones, so
+    no lookup encrypts more than ELEMENT_BUDGET characters per grid length.
+
+    Attributes:
+        path (str): The JSON file the distributions are persisted to, or None.
+        samples (int): The number of random strings per distribution.
+        seed (int): The seed of the random strings, so every process computes the same values.
+    """
+
+    VERSION = 1
+    EXACT_LENGTHS = 64
+    # Geometric spacing of the computed lengths beyond EXACT_LENGTHS
+    STEPS_PER_DOUBLING = 8
+    # Upper bound on samples * length encrypted at once
+    ELEMENT_BUDGET = 1 << 22
+    MIN_SAMPLES = 16
+    # Longest length sampled with MIN_SAMPLES strings inside the budget
+    MAX_LENGTH = ELEMENT_BUDGET // MIN_SAMPLES
+    STATISTICS = ("mean", "std", "p05", "p50", "p95")
+
+    def __init__(self, path: str = None, samples: int = 256, seed: int = 0) -> None:
+        """
+        The constructor for the ReferenceDistributions class.
+
+        Parameters:
+            path (str): Optional JSON file to load the distributions from and save new ones to.
+            samples (int): The number of random strings per distribution.
+            seed (int): The seed of the random strings.
+        """
+        self.path = path
+        self.samples = samples
+        self.seed = seed
+        self._distributions: Dict[str, Dict[str, float]] = {}
+        if path and os.path.exists(path):
+            with open(path) as file:
+                stored = json.load(file)
+            if stored.get("version") == self.VERSION and stored.get("samples") == samples \
+                    and stored.get("seed") == seed:
+                self._distributions = stored["distributions"]
+
+    @classmethod
+    def _grid_length(cls, step: int) -> int:
+        """
+        The step-th computed length beyond EXACT_LENGTHS.
+        """
+        return round(cls.EXACT_LENGTHS * 2 ** (step / cls.STEPS_PER_DOUBLING))
+
+    def distribution(self, cipher: 'Cipher', length: int) -> Dict[str, float]:
+        """
+        Looks up the reference distribution for a cipher kind and input length,
+        computing the neighbouring grid distributions on first use.
+
+        Parameters:
+            cipher (Cipher): A cipher of the kind to sample; only its type is used.
+            length (int): The input length.
+
+        Returns:
+            Dict[str, float]: The mean, standard deviation and 5th, 50th and 95th percentile of the statistic.
+        """
+        if length <= self.EXACT_LENGTHS:
+            return self._computed(cipher, length)
+        if length > self.MAX_LENGTH:
+            return self._extrapolated(cipher, length)
+        step = int(math.log2(length / self.EXACT_LENGTHS) * self.STEPS_PER_DOUBLING)
+        low, high = self._grid_length(step), self._grid_length(step + 1)
+        if length <= low:
+            return self._computed(cipher, low)
+        lower, upper = self._computed(cipher, low), self._computed(cipher, high)
+        weight = (length - low) / (high - low)
+        return {name: lower[name] + weight * (upper[name] - lower[name]) for name in self.STATISTICS}
+
+    def _extrapolated(self, cipher: 'Cipher', length: int) -> Dict[str, float]:
+        """
+        Extends the distribution past MAX_LENGTH. The mean follows the power law through
+        the longest computed length and the one a doubling below it (linear in the
+        length for Cipher, whose noise and text characters have different frequencies,
+        and a square root for AESCipher, whose bytes are uniform). The spread around the
+        mean, being sampling noise, grows with the square root of the length.
+
+        Parameters:
+            cipher (Cipher): A cipher of the kind to sample.
+            length (int): The input length, beyond MAX_LENGTH.
+
+        Returns:
+            Dict[str, float]: The statistics of the distribution.
+        """
+        step = int(math.log2(self.MAX_LENGTH / self.EXACT_LENGTHS) * self.STEPS_PER_DOUBLING)
+        top, below = self._grid_length(step), self._grid_length(step - self.STEPS_PER_DOUBLING)
+        upper, lower = self._computed(cipher, top), self._computed(cipher, below)
+        exponent = math.log(upper["mean"] / lower["mean"]) / math.log(top / below) \
+            if upper["mean"] > 0 and lower["mean"] > 0 else 0.0
+        mean = upper["mean"] * (length / top) ** exponent
+        scale = math.sqrt(length / top)
+        result = {name: mean + (upper[name] - upper["mean"]) * scale for name in ("p05", "p50", "p95")}
+        return {"mean": mean, "std": upper["std"] * scale, **result}
+
+    def _computed(self, cipher: 'Cipher', length: int) -> Dict[str, float]:
+        """
+        Returns the distribution at one computed length, sampling it if it is not known yet.
+
+        Parameters:
+            cipher (Cipher): A cipher of the kind to sample.
+            length (int): The input length.
+
+        Returns:
+            Dict[str, float]: The statistics of the distribution.
+        """
+        key = f"{type(cipher).__name__}:{length}"
+        if key not in self._distributions:
+            self._distributions[key] = self._sample(cipher, length)
+            if self.path:
+                self.save()
+        return self._distributions[key]
+
+    def _sample(self, cipher: 'Cipher', length: int) -> Dict[str, float]:
+        """
+        Encrypts a batch of random printable strings and summarizes their statistic.
+
+        Parameters:
+            cipher (Cipher): A cipher of the kind to sample.
+            length (int): The length of the random strings.
+
+        Returns:
+            Dict[str, float]: The statistics of the distribution.
+        """
+        samples = max(self.MIN_SAMPLES, min(self.samples, self.ELEMENT_BUDGET // max(length, 1)))
+        source = NumpyRandomSource([self.seed, length])
+        text = source.text(string.printable, samples * length)
+        strings = [text[i * length:(i + 1) * length] for i in range(samples)]
+        if type(cipher) is Cipher:
+            encrypted = Cipher.encrypt_many(strings, source)
+        else:
+            encrypted = []
+            for random_string in strings:
+                # Fresh keys and nonces from the seeded source, never from the scored cipher
+                sample = type(cipher)(random_string, random_source=source)
+                sample.encrypt()
+                encrypted.append(sample.encrypted_string)
+
+        if len({len(e) for e in encrypted}) == 1:
+            spreads = frequency_spreads(np.stack([_string_codes(e) for e in encrypted]))
+        else:
+            spreads = np.array([_unigram_counts(_string_codes(e))[0].std() for e in encrypted])
+        values = spreads / len(string.printable)
+        p05, p50, p95 = np.percentile(values, [5, 50, 95])
+        return {"mean": float(values.mean()), "std": float(values.std()), "p05": float(p05),
+                "p50": float(p50), "p95": float(p95)}
+
+    def save(self, path: str = None) -> None:
+        """
+        Writes the distributions computed so far to a JSON file.
+
+        Parameters:
+            path (str): The file to write. Defaults to the path given to the constructor.
+        """
+        path = path or self.path
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as file:
+            json.dump({"version": self.VERSION, "samples": self.samples, "seed": self.seed,
+                       "distributions": self._distributions}, file)
+        # Replace atomically, so concurrent workers never read a partial file
+        os.replace(temporary, path)
+
+
+# Shared by every Scoring that is not given its own reference distributions
+DEFAULT_REFERENCE = ReferenceDistributions()
+
+
+@lru_cache(maxsize=None)
+def open_reference(path: str) -> ReferenceDistributions:
+    """
+    Opens persisted reference distributions once per process.
+
+    Parameters:
+        path (str): The JSON file.
+
+    Returns:
+        ReferenceDistributions: The reference distributions.
+    """
+    return ReferenceDistributions(path)
 
-    main(2.0)  # Maximum length multiplier is set to twice the length of the original string
      
+
+
+class RandomSource:
+    """
+    The RandomSource class is where Cipher, Scoring and AESCipher draw their random
+    numbers from. Sources hand out whole arrays or strings per call, so the hot
+    loops make one call per string rather than one per character.
+
+    This base source uses the standard random module, so the core stays importable
+    without NumPy. Without a seed it shares the global generator (random.seed()
+    still applies); with a seed it is a private, reproducible random.Random.
+
+    Attributes:
+        seed (int): The seed, or None for the global generator.
+    """
+
+    def __init__(self, seed: int = None) -> None:
+        """
+        The constructor for the RandomSource class.
+
+        Parameters:
+            seed (int): Optional seed for a deterministic stream.
+        """
+        self.seed = seed
+        self._rng = random if seed is None else random.Random(seed)
+
+    def randint(self, low: int, high: int) -> int:
+        """
+        Draws one integer from low to high, both included.
+        """
+        return self._rng.randint(low, high)
+
+    def integers(self, low: int, high: int, size: int) -> List[int]:
+        """
+        Draws size integers from low to high, both included.
+        """
+        return self._rng.choices(range(low, high + 1), k=size)
+
+    def characters(self, low: int, high: int, size: int) -> str:
+        """
+        Draws a string of size characters whose codepoints lie from low to high, both included.
+        """
+        codepoints = array.array("I", self.integers(low, high, size))
+        return codepoints.tobytes().decode("utf-32-le" if sys.byteorder == "little" else "utf-32-be")
+
+    def text(self, alphabet: str, size: int) -> str:
+        """
+        Draws a string of size characters picked uniformly from alphabet.
+        """
+        return "".join(self._rng.choices(alphabet, k=size))
+
+    def bytes(self, size: int) -> bytes:
+        """
+        Draws size random bytes.
+        """
+        return self._rng.randbytes(size)
+
+
+class NumpyRandomSource(RandomSource):
+    """
+    The NumpyRandomSource class draws from a NumPy Generator, producing noise and
+    random strings as arrays in bulk. With a seed (anything SeedSequence accepts,
+    e.g. [seed, record number]) the stream is deterministic.
+    """
+
+    def __init__(self, seed: object = None) -> None:
+        """
+        The constructor for the NumpyRandomSource class.
+
+        Parameters:
+            seed (object): Optional seed for a deterministic stream.
+        """
+        self.seed = seed
+        self._rng = np.random.default_rng(seed)
+
+    def randint(self, low: int, high: int) -> int:
+        return int(self._rng.integers(low, high, endpoint=True))
+
+    def integers(self, low: int, high: int, size: int) -> np.ndarray:
+        return self._rng.integers(low, high, size=size, endpoint=True)
+
+    def characters(self, low: int, high: int, size: int) -> str:
+        return _codepoints_text(self.integers(low, high, size))
+
+    def text(self, alphabet: str, size: int) -> str:
+        return _alphabet_text(alphabet, self.integers(0, len(alphabet) - 1, size))
+
+    def bytes(self, size: int) -> bytes:
+        return self._rng.bytes(size)
+
+
+class UrandomSource(RandomSource):
+    """
+    The UrandomSource class draws from the operating system's CSPRNG through a byte
+    pool that is refilled with one os.urandom() call per pool_size bytes. Integers
+    are drawn by rejection sampling, so they carry no modulo bias. It cannot be
+    seeded.
+    """
+
+    def __init__(self, pool_size: int = 1 << 20) -> None:
+        """
+        The constructor for the UrandomSource class.
+
+        Parameters:
+            pool_size (int): The number of bytes fetched per refill.
+        """
+        self.seed = None
+        self.pool_size = pool_size
+        self._pool = b""
+        self._position = 0
+
+    def bytes(self, size: int) -> bytes:
+        if self._position + size > len(self._pool):
+            self._pool = self._pool[self._position:] + os.urandom(max(self.pool_size, size))
+            self._position = 0
+        start = self._position
+        self._position += size
+        return self._pool[start:self._position]
+
+    def randint(self, low: int, high: int) -> int:
+        return int(self.integers(low, high, 1)[0])
+
+    def integers(self, low: int, high: int, size: int) -> np.ndarray:
+        span = high - low + 1
+        if not 0 < span <= 1 << 32:
+            raise ValueError("UrandomSource draws from ranges of 1 to 2**32 values")
+        # Values at or above the largest multiple of span would favour small results
+        limit = (1 << 32) // span * span
+        drawn = []
+        missing = size
+        while missing > 0:
+            words = np.frombuffer(self.bytes(4 * (missing + missing // 8 + 8)), dtype="<u4")
+            words = words[words < limit][:missing]
+            drawn.append(words)
+            missing -= words.size
+        values = np.concatenate(drawn) if drawn else np.empty(0, dtype=np.uint32)
+        return (values % span).astype(np.int64) + low
+
+    def characters(self, low: int, high: int, size: int) -> str:
+        return _codepoints_text(self.integers(low, high, size))
+
+    def text(self, alphabet: str, size: int) -> str:
+        return _alphabet_text(alphabet, self.integers(0, len(alphabet) - 1, size))
+
+
+def _codepoints_text(codepoints: np.ndarray) -> str:
+    """
+    Converts an array of codepoints to a string.
+
+    Parameters:
+        codepoints (np.ndarray): The codepoints.
+
+    Returns:
+        str: The string.
+    """
+    return codepoints.astype("<u4").tobytes().decode("utf-32-le", "surrogatepass")
+
+
+def _alphabet_text(alphabet: str, indices: np.ndarray) -> str:
+    """
+    Builds a string from positions in an alphabet.
+
+    Parameters:
+        alphabet (str): The characters to pick from.
+        indices (np.ndarray): The position of each character.
+
+    Returns:
+        str: The string.
+    """
+    codes = np.frombuffer(alphabet.encode("utf-32-le", "surrogatepass"), dtype="<u4")
+    return _codepoints_text(codes[indices])
+
+
+RANDOM_SOURCES = {"python": RandomSource, "numpy": NumpyRandomSource, "urandom": UrandomSource}
+
+# Used by every Cipher and Scoring that is not given a source
+DEFAULT_RANDOM_SOURCE = RandomSource()
+
+
+def make_random_source(kind: str = "python", seed: object = None) -> RandomSource:
+    """
+    Creates a random source by name.
+
+    Parameters:
+        kind (str): A key of RANDOM_SOURCES.
+        seed (object): Optional seed for a deterministic stream; not supported by "urandom".
+
+    Returns:
+        RandomSource: The random source.
+    """
+    if kind not in RANDOM_SOURCES:
+        raise ValueError(f"Unknown random source: {kind}")
+    if seed is None:
+        return RANDOM_SOURCES[kind]()
+    if kind == "urandom":
+        raise ValueError("The urandom source cannot be seeded")
+    return RANDOM_SOURCES[kind](seed)
+
+
+@lru_cache(maxsize=None)
+def _bulk_random_source() -> NumpyRandomSource:
+    """
+    The source used by Cipher.encrypt_many() when it is not given one.
+
+    Returns:
+        NumpyRandomSource: A process-wide, unseeded NumPy source.
+    """
+    return NumpyRandomSource()
+
+
+def _to_codepoints(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Converts a list of strings into one flat array of Unicode codepoints.
+
+    Parameters:
+        strings (List[str]): The strings to convert.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The concatenated codepoints (int64) and the length of each string.
+    """
+    lengths = np.fromiter((len(s) for s in strings), dtype=np.int64, count=len(strings))
+    raw = "".join(strings).encode("utf-32-le", "surrogatepass")
+    return np.frombuffer(raw, dtype=np.uint32).astype(np.int64), lengths
+
+
+def _from_codepoints(codepoints: np.ndarray, lengths: np.ndarray) -> List[str]:
+    """
+    Converts a flat codepoint array back into a list of strings.
+
+    Parameters:
+        codepoints (np.ndarray): The concatenated codepoints.
+        lengths (np.ndarray): The length of each string in the array.
+
+    Returns:
+        List[str]: The decoded strings.
+    """
+    if codepoints.size and (codepoints.min() < 0 or codepoints.max() > sys.maxunicode):
+        raise ValueError("chr() arg not in range(0x110000)")
+    text = codepoints.astype("<u4").tobytes().decode("utf-32-le", "surrogatepass")
+    bounds = np.concatenate(([0], np.cumsum(lengths))).tolist()
+    return [text[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def _segment_positions(lengths: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Builds, for every element of a flattened batch, its record number and its
+    position inside that record.
+
+    Parameters:
+        lengths (np.ndarray): The length of each record.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The record index and the in-record position of each element.
+    """
+    record = np.repeat(np.arange(len(lengths)), lengths)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+    position = np.arange(int(lengths.sum()), dtype=np.int64) - starts[record]
+    return record, position
+
+
+class Cipher:
+    """
+    The Cipher class handles the encryption and decryption of strings using a custom
+    cipher.
+
+    Attributes:
+        original_string (str): The original string that will be encrypted.
+        encrypted_string (str): The encrypted string after encryption.
+        random_source (RandomSource): Where the shift and the noise are drawn from.
+    """
+
+    def __init__(self, original_string: str, random_source: RandomSource = None) -> None:
+        """
+        The constructor for the Cipher class.
+
+        Parameters:
+            original_string (str): The original string that will be encrypted.
+            random_source (RandomSource): The source of the shift and the noise. Defaults to
+                                          DEFAULT_RANDOM_SOURCE.
+        """
+        self.original_string = original_string
+        self.encrypted_string = ""
+        self.random_source = random_source or DEFAULT_RANDOM_SOURCE
+
+    def encrypt(self) -> None:
+        """
+        Encrypts the original string by swapping each character with a character a fixed
+        number of places down the alphabet.
+        """
+        word = self.original_string[::-1]
+        r1 = self.random_source.randint(0, 7)
+        # Shift every distinct character once instead of every position
+        ascii_word = word.translate({code: code - r1 for code in set(map(ord, word))})
+
+        # Layout: first char, then (char, noise) pairs; the noise is drawn in one call and
+        # interleaved as 4-byte codepoints, with no object per character
+        noise = self.random_source.characters(ord("!"), ord("য"), len(word) - 1)
+        interleaved = bytearray(4 * (len(ascii_word) + len(noise)))
+        units = memoryview(interleaved).cast("I")
+        codes = memoryview(ascii_word.encode("utf-32-le", "surrogatepass")).cast("I")
+        units[0] = codes[0]
+        units[1::2] = codes[1:]
+        units[2::2] = memoryview(noise.encode("utf-32-le")).cast("I")
+        codes.release()
+        units.release()
+
+        t = str(r1 + 2) + interleaved.decode("utf-32-le", "surrogatepass")
+        if len(t) == len(word) * 2 - 1:
+            self.encrypted_string = t + "A"
+        else:
+            self.encrypted_string = t
+
+    @staticmethod
+    def encrypt_many(strings: List[str], random_source: RandomSource = None,
+                     shared_randomness: bool = False) -> List[str]:
+        """
+        Encrypts a batch of strings at once. The reversal, the shift, the noise
+        interleave and the padding are done as NumPy array operations over all
+        the strings together, and each result has the same format as encrypt().
+
+        Parameters:
+            strings (List[str]): The strings to encrypt.
+            random_source (RandomSource): The source of the shifts and the noise. Defaults to a
+                                          process-wide NumpyRandomSource.
+            shared_randomness (bool): Encrypt every string with the same shift and noise, as
+                                      avalanche analysis needs; the strings must have equal length.
+
+        Returns:
+            List[str]: The encrypted strings, in the same order as the input.
+        """
+        if not strings:
+            return []
+        codepoints, lengths = _to_codepoints(strings)
+        if (lengths == 0).any():
+            raise ValueError("Cannot encrypt an empty string")
+        if shared_randomness and (lengths != lengths[0]).any():
+            raise ValueError("Shared randomness needs strings of equal length")
+
+        record, position = _segment_positions(lengths)
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+        # Reverse every record and apply its shift
+        source = random_source or _bulk_random_source()
+        if shared_randomness:
+            shifts = np.repeat(np.asarray(source.integers(0, 7, 1), dtype=np.int64), len(strings))
+        else:
+            shifts = np.asarray(source.integers(0, 7, len(strings)), dtype=np.int64)
+        reversed_index = starts[record] + lengths[record] - 1 - position
+        shifted = codepoints[reversed_index] - shifts[record]
+
+        # Layout of each record: shift digit, first char, then (char, noise) pairs
+        out_lengths = 2 * lengths
+        out_starts = 2 * starts
+        out = np.empty(int(out_lengths.sum()), dtype=np.int64)
+        out[out_starts] = shifts + 2 + ord("0")
+        out[out_starts[record] + np.maximum(1, 2 * position)] = shifted
+        noise_slots = out_starts[record] + 2 * position + 1
+        noise_slots = noise_slots[position > 0]
+        if shared_randomness:
+            noise = np.asarray(source.integers(ord("!"), ord("য"), int(lengths[0]) - 1), dtype=np.int64)
+            out[noise_slots] = np.tile(noise, len(strings))
+        else:
+            out[noise_slots] = np.asarray(source.integers(ord("!"), ord("য"), noise_slots.size), dtype=np.int64)
+
+        return _from_codepoints(out, out_lengths)
+
+    @staticmethod
+    def decrypt_many(encrypted_strings: List[str]) -> List[str]:
+        """
+        Decrypts a batch of strings produced by encrypt() or encrypt_many(). The
+        de-interleave, the shift and the reversal are done as NumPy array
+        operations, and each result is the same as decrypt() would return.
+
+        Parameters:
+            encrypted_strings (List[str]): The encrypted strings.
+
+        Returns:
+            List[str]: The decrypted strings, in the same order as the input.
+        """
+        if not encrypted_strings:
+            return []
+        codepoints, lengths = _to_codepoints(encrypted_strings)
+        if (lengths == 0).any():
+            raise ValueError("invalid literal for int() with base 10: ''")
+
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        digits = codepoints[starts] - ord("0")
+        if ((digits < 0) | (digits > 9)).any():
+            raise ValueError("Encrypted string does not start with a shift digit")
+        shifts = digits - 2
+
+        # Even-length strings carry a trailing noise/padding character
+        trimmed = lengths - (lengths % 2 == 0)
+        kept = np.where(trimmed < 2, 0, 1 + (trimmed - 1) // 2)
+
+        record, position = _segment_positions(kept)
+        source = kept[record] - 1 - position
+        source_index = starts[record] + np.maximum(1, 2 * source)
+        plain = codepoints[source_index] + shifts[record]
+
+        return _from_codepoints(plain, kept)
+
+    def decrypt(self) -> str:
+        """
+        Decrypts the encrypted string by swapping each character with a character a fixed
+        number of places up the alphabet.
+
+        Returns:
+            str: The decrypted string.
+        """
+        # Decrypt the string
+        # return self.encrypted_string[::-1]
+
+        encrypted_text = self.encrypted_string
+        if len(encrypted_text)%2==0:
+          encrypted_text = encrypted_text [0:len(encrypted_text)-1]
+        else:
+          encrypted_text=encrypted_text
+
+        r1 = (int(encrypted_text[:1]))-2
+
+        ex=encrypted_text[1:2]
+        encrypted_pairs = encrypted_text[2:]
+        a=""
+        b=""
+        encrypted_pair=list(encrypted_pairs)
+        for i in range(0,len(encrypted_pair),2):
+            a=a+encrypted_pair[i]
+        c=ex+a
+        for i in c:
+          b+=chr((ord(i))+r1)
+        b=b[::-1]
+        return b
+
+
+@lru_cache(maxsize=None)
+def _aes_tables() -> Tuple[np.ndarray, List[np.ndarray], List[np.ndarray]]:
+    """
+    Builds the AES S-box and the encryption T-tables on first use.
+
+    Returns:
+        Tuple[np.ndarray, List[np.ndarray], List[np.ndarray]]: The S-box, the four round
+        T-tables (SubBytes + ShiftRows + MixColumns) and the four final-round tables
+        (SubBytes + ShiftRows only), each as a 256-entry uint32 array.
+    """
+    def xtime(b: int) -> int:
+        return ((b << 1) ^ 0x1B) & 0xFF if b & 0x80 else b << 1
+
+    def gf_mul(a: int, b: int) -> int:
+        result = 0
+        while b:
+            if b & 1:
+                result ^= a
+            a = xtime(a)
+            b >>= 1
+        return result
+
+    # Multiplicative inverse in GF(2^8) followed by the affine transform
+    inverse = [0] * 256
+    for a in range(1, 256):
+        for b in range(1, 256):
+            if gf_mul(a, b) == 1:
+                inverse[a] = b
+                break
+    sbox = []
+    for a in range(256):
+        x = inverse[a]
+        s = x
+        for shift in range(1, 5):
+            s ^= ((x << shift) | (x >> (8 - shift))) & 0xFF
+        sbox.append(s ^ 0x63)
+
+    te0 = [(xtime(s) << 24) | (s << 16) | (s << 8) | (xtime(s) ^ s) for s in sbox]
+    te = [np.array([((w >> (8 * i)) | (w << (32 - 8 * i))) & 0xFFFFFFFF for w in te0], dtype=np.uint32)
+          for i in range(4)]
+    fe = [np.array([s << (24 - 8 * i) for s in sbox], dtype=np.uint32) for i in range(4)]
+    return np.array(sbox, dtype=np.uint8), te, fe
+
+
+# Position of each byte of a uint32 word (most significant first) in its native memory view
+_AES_BYTE = (3, 2, 1, 0) if sys.byteorder == "little" else (0, 1, 2, 3)
+
+# FIPS-197 Appendix B and C.1-C.3: (key, plaintext, ciphertext)
+_FIPS197_VECTORS = [
+    ("2b7e151628aed2a6abf7158809cf4f3c", "3243f6a8885a308d313198a2e0370734", "3925841d02dc09fbdc118597196a0b32"),
+    ("000102030405060708090a0b0c0d0e0f", "00112233445566778899aabbccddeeff", "69c4e0d86a7b0430d8cdb78070b4c55a"),
+    ("000102030405060708090a0b0c0d0e0f1011121314151617",
+     "00112233445566778899aabbccddeeff", "dda97ca4864cdfe06eaf70a0ec0d7191"),
+    ("000102030405060708090a0b0c0d0e0f101112131415161718191a1b1c1d1e1f",
+     "00112233445566778899aabbccddeeff", "8ea2b7ca516745bfeafc49904b496089"),
+]
+
+
+class AESCipher:
+    """
+    The AESCipher class encrypts and decrypts strings with real AES-128/192/256 in
+    CTR mode. Blocks are processed in bulk with NumPy using precomputed T-tables.
+
+    The encrypted string is the 8-byte nonce followed by the ciphertext bytes, with
+    each byte stored as one character (latin-1), so its length stays close to the
+    length of the original string.
+
+    Attributes:
+        original_string (str): The original string that will be encrypted.
+        encrypted_string (str): The encrypted string after encryption.
+        key (bytes): The 16, 24 or 32 byte AES key.
+        random_source (RandomSource): Where generated keys and nonces come from; None uses os.urandom().
+    """
+
+    BLOCK_SIZE = 16
+    NONCE_SIZE = 8
+    # Number of blocks run through the rounds together; keeps the working set in cache
+    BATCH_BLOCKS = 16384
+
+    def __init__(self, original_string: str, key: bytes = None, random_source: RandomSource = None) -> None:
+        """
+        The constructor for the AESCipher class.
+
+        Parameters:
+            original_string (str): The original string that will be encrypted.
+            key (bytes): The AES key. A random 128-bit key is generated if it is not given.
+            random_source (RandomSource): Optional source of generated keys and nonces, e.g. a seeded one
+                                          for reproducible benchmarks. Defaults to os.urandom().
+        """
+        self.random_source = random_source
+        if key is None:
+            key = self._random_bytes(16)
+        if len(key) not in (16, 24, 32):
+            raise ValueError("AES key must be 16, 24 or 32 bytes long")
+        self.original_string = original_string
+        self.encrypted_string = ""
+        self.key = bytes(key)
+        self.round_keys = self._expand_key(self.key)
+
+    def _random_bytes(self, size: int) -> bytes:
+        """
+        Draws key or nonce bytes.
+
+        Parameters:
+            size (int): The number of bytes.
+
+        Returns:
+            bytes: The random bytes.
+        """
+        return os.urandom(size) if self.random_source is None else self.random_source.bytes(size)
+
+    @staticmethod
+    def _expand_key(key: bytes) -> np.ndarray:
+        """
+        Expands the key into the round key schedule.
+
+        Parameters:
+            key (bytes): The AES key.
+
+        Returns:
+            np.ndarray: The 4 * (rounds + 1) round key words as uint32.
+        """
+        sbox = _aes_tables()[0]
+        nk = len(key) // 4
+        rounds = nk + 6
+        words = [int.from_bytes(key[4 * i:4 * i + 4], "big") for i in range(nk)]
+        rcon = 1
+        for i in range(nk, 4 * (rounds + 1)):
+            temp = words[i - 1]
+            if i % nk == 0:
+                temp = ((temp << 8) | (temp >> 24)) & 0xFFFFFFFF
+                temp = int.from_bytes(bytes(sbox[temp.to_bytes(4, "big")[j]] for j in range(4)), "big")
+                temp ^= rcon << 24
+                rcon = ((rcon << 1) ^ 0x1B) & 0xFF if rcon & 0x80 else rcon << 1
+            elif nk > 6 and i % nk == 4:
+                temp = int.from_bytes(bytes(sbox[temp.to_bytes(4, "big")[j]] for j in range(4)), "big")
+            words.append(words[i - nk] ^ temp)
+        return np.array(words, dtype=np.uint32)
+
+    def encrypt_blocks(self, blocks: np.ndarray) -> np.ndarray:
+        """
+        Encrypts many 16-byte blocks at once (ECB, one block per row).
+
+        Parameters:
+            blocks (np.ndarray): A (n, 4) array of big-endian block words as uint32.
+
+        Returns:
+            np.ndarray: A (n, 4) uint32 array with the encrypted blocks.
+        """
+        _, round_tables, final_tables = _aes_tables()
+        rk = self.round_keys
+        rounds = len(rk) // 4 - 1
+        n = len(blocks)
+
+        # One row per state column; the byte view gives the table indexes without shifting
+        state = np.ascontiguousarray((blocks ^ rk[:4]).T)
+        scratch = np.empty_like(state)
+        for r in range(1, rounds + 1):
+            t0, t1, t2, t3 = round_tables if r < rounds else final_tables
+            state_bytes = state.view(np.uint8).reshape(4, n, 4)
+            for c in range(4):
+                column = scratch[c]
+                np.take(t0, state_bytes[c, :, _AES_BYTE[0]], out=column)
+                column ^= np.take(t1, state_bytes[(c + 1) % 4, :, _AES_BYTE[1]])
+                column ^= np.take(t2, state_bytes[(c + 2) % 4, :, _AES_BYTE[2]])
+                column ^= np.take(t3, state_bytes[(c + 3) % 4, :, _AES_BYTE[3]])
+                column ^= rk[4 * r + c]
+            state, scratch = scratch, state
+        return np.ascontiguousarray(state.T)
+
+    def ctr_xor(self, data: bytes, nonce: bytes, initial_counter: int = 0) -> bytes:
+        """
+        Encrypts or decrypts data in CTR mode. The counter block is the 8-byte nonce
+        followed by a 64-bit big-endian block counter.
+
+        Parameters:
+            data (bytes): The plaintext or ciphertext.
+            nonce (bytes): The 8-byte nonce.
+            initial_counter (int): The counter value of the first block.
+
+        Returns:
+            bytes: The data XORed with the keystream.
+        """
+        if len(nonce) != self.NONCE_SIZE:
+            raise ValueError(f"CTR nonce must be {self.NONCE_SIZE} bytes long")
+        n_blocks = -(-len(data) // self.BLOCK_SIZE)
+        high = np.uint32(int.from_bytes(nonce[:4], "big"))
+        low = np.uint32(int.from_bytes(nonce[4:], "big"))
+
+        keystream = np.empty((n_blocks, 4), dtype=np.uint32)
+        for start in range(0, n_blocks, self.BATCH_BLOCKS):
+            stop = min(start + self.BATCH_BLOCKS, n_blocks)
+            counters = np.arange(initial_counter + start, initial_counter + stop, dtype=np.uint64)
+            blocks = np.empty((stop - start, 4), dtype=np.uint32)
+            blocks[:, 0] = high
+            blocks[:, 1] = low
+            blocks[:, 2] = (counters >> np.uint64(32)).astype(np.uint32)
+            blocks[:, 3] = (counters & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+            keystream[start:stop] = self.encrypt_blocks(blocks)
+
+        stream = np.frombuffer(keystream.astype(">u4").tobytes(), dtype=np.uint8)[:len(data)]
+        return (np.frombuffer(data, dtype=np.uint8) ^ stream).tobytes()
+
+    def encrypt(self) -> None:
+        """
+        Encrypts the original string (as UTF-8) in CTR mode under a fresh random nonce.
+        """
+        nonce = self._random_bytes(self.NONCE_SIZE)
+        ciphertext = self.ctr_xor(self.original_string.encode("utf-8"), nonce)
+        self.encrypted_string = (nonce + ciphertext).decode("latin-1")
+
+    def decrypt(self) -> str:
+        """
+        Decrypts the encrypted string.
+
+        Returns:
+            str: The decrypted string.
+        """
+        raw = self.encrypted_string.encode("latin-1")
+        nonce, ciphertext = raw[:self.NONCE_SIZE], raw[self.NONCE_SIZE:]
+        return self.ctr_xor(ciphertext, nonce).decode("utf-8")
+
+    @classmethod
+    def self_test(cls) -> bool:
+        """
+        Checks the block cipher against the FIPS-197 known-answer test vectors.
+
+        Returns:
+            bool: True if every test vector matches.
+        """
+        for key, plaintext, ciphertext in _FIPS197_VECTORS:
+            block = np.frombuffer(bytes.fromhex(plaintext), dtype=">u4").astype(np.uint32).reshape(1, 4)
+            result = cls("", bytes.fromhex(key)).encrypt_blocks(block)
+            if result.astype(">u4").tobytes().hex() != ciphertext:
+                return False
+        return True
+
+
+# The strings scored when no corpus file is given
+SAMPLE_STRINGS = [
+    "Hello, World!",
+    "This is a sample string",
+    "Another string for testing",
+    "A very very long string that should result in a high score",
+    "Short string",
+    "abcdefghijklmnopqrstuvwxyz",
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZ",
+    "1234567890",
+    "A string with special characters: !@#$%^&*()",
+    "A string with spaces    between     words",
+    "A string with a mix of letters, numbers, and special characters: abc123!@#"
+]
+
+# The default weights for each metric; a weights file overrides individual entries
+DEFAULT_WEIGHTS = {
+    "unique_chars": 0.1,
+    "distinct_sequences": 1.0,
+    "entropy": 1.5,
+    "frequency_analysis": 0.1,
+    "length_consistency": 0.5,
+    "evenness": 1.2,
+    "reversibility": 2.0,
+    "change_propagation": 1.5,
+    "pattern_analysis": 1.5,
+    "correlation_analysis": 1.5,
+    "complexity": 1.0,
+    "randomness": 1.5,
+    "normalized_levenshtein": 1.0,
+    "encryption_consistency": 2.0,  # High weight as this is critical
+    "running_time": 0.5
+}
+
+CIPHER_CLASSES = {"Cipher": Cipher, "AESCipher": AESCipher}
+
+# Columns of the CSV output; the JSONL output has the same keys
+RESULT_FIELDS = ["index", "original_string", "encrypted_string", "decrypted_string",
+                 "decryption_success", "score", "running_time", *(f"{name}_metric" for name in Scoring.METRIC_NAMES),
+                 "approximated"]
+
+
+def score_records(records: List[Tuple[int, str]], weights: Dict[str, float], max_length_multiplier: float,
+                  cipher_name: str = "Cipher", timing_trials: int = 5,
+                  cache_path: str = None, seed: int = None, reference_path: str = None,
+                  approximate: bool = False, time_budget: float = None) -> List[Dict[str, object]]:
+    """
+    Encrypts, decrypts and scores a batch of strings. This is the unit of work sent to
+    the worker processes by score_corpus().
+
+    Parameters:
+        records (List[Tuple[int, str]]): The record numbers and strings to score.
+        weights (Dict[str, float]): A dictionary containing the weights for each metric.
+        max_length_multiplier (float): The maximum allowed ratio of the length of the encrypted string
+                                       to the length of the original string.
+        cipher_name (str): The cipher class to use, a key of CIPHER_CLASSES.
+        timing_trials (int): The number of timed encryptions for the running time.
+        cache_path (str): Optional ScoreCache database shared by all the workers.
+        seed (int): Optional seed; each record then gets seeded NumpyRandomSources for its cipher and its
+                    scoring, so the results do not depend on how records are spread over the workers.
+        reference_path (str): Optional JSON file persisting the randomness reference distributions.
+        approximate (bool): Estimate the heavy Levenshtein metrics instead of computing them.
+        time_budget (float): Optional per-input budget in seconds beyond which heavy metrics are estimated.
+
+    Returns:
+        List[Dict[str, object]]: One result per record, with the RESULT_FIELDS keys.
+    """
+    cache = open_score_cache(cache_path) if cache_path else None
+    reference = open_reference(reference_path) if reference_path else None
+    results = []
+    for index, original_string in records:
+        random_source = None if seed is None else NumpyRandomSource([seed, index])
+        scoring_source = None if seed is None else NumpyRandomSource([seed, index, 1])
+        cipher = CIPHER_CLASSES[cipher_name](original_string, random_source=random_source)
+
+        # Time the encryption; the median of several runs is robust to clock noise
+        running_time = measure(cipher.encrypt, warmup=1, trials=timing_trials)["median_ns"] / 1e9
+
+        scoring = Scoring(cipher, running_time, weights, max_length_multiplier, cache=cache, reference=reference,
+                          approximate=approximate, time_budget=time_budget, random_source=scoring_source)
+        decrypted_string = cipher.decrypt()
+        result = {
+            "index": index,
+            "original_string": original_string,
+            "encrypted_string": cipher.encrypted_string,
+            "decrypted_string": decrypted_string,
+            "decryption_success": decrypted_string == original_string,
+            "score": float(scoring.score),
+            "running_time": running_time,
+        }
+        result.update({f"{name}_metric": float(value) for name, value in scoring.summary.items()})
+        # Names of the metrics that were estimated, with their confidence bounds
+        result["approximated"] = ",".join(f"{name}[{bounds['low']:.6g},{bounds['high']:.6g}]"
+                                          for name, bounds in scoring.approximations.items())
+        results.append(result)
+    return results
+
+
+def _batched(records: Iterator[Tuple[int, str]], batch_size: int) -> Iterator[List[Tuple[int, str]]]:
+    """
+    Groups records into lists of batch_size.
+
+    Parameters:
+        records (Iterator[Tuple[int, str]]): The records.
+        batch_size (int): The number of records per batch.
+
+    Yields:
+        List[Tuple[int, str]]: The next batch.
+    """
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def score_corpus(strings: Iterable[str], weights: Dict[str, float], max_length_multiplier: float,
+                 cipher_name: str = "Cipher", workers: int = 1, batch_size: int = 64,
+                 timing_trials: int = 5, cache_path: str = None, seed: int = None,
+                 reference_path: str = None, approximate: bool = False,
+                 time_budget: float = None) -> Iterator[Dict[str, object]]:
+    """
+    Scores a corpus of strings, fanning batches out over a process pool. Only a few
+    batches per worker are in flight at once, so the corpus is never held in memory,
+    and results are yielded as soon as their batch completes (not in corpus order;
+    each result carries its record index).
+
+    Parameters:
+        strings (Iterable[str]): The strings to score.
+        weights (Dict[str, float]): A dictionary containing the weights for each metric.
+        max_length_multiplier (float): The maximum allowed ratio of the length of the encrypted string
+                                       to the length of the original string.
+        cipher_name (str): The cipher class to use, a key of CIPHER_CLASSES.
+        workers (int): The number of worker processes; 1 scores in this process.
+        batch_size (int): The number of strings per task.
+        timing_trials (int): The number of timed encryptions for each running time.
+        cache_path (str): Optional ScoreCache database consulted before scoring each string.
+        seed (int): Optional seed for reproducible ciphertexts and metrics.
+        reference_path (str): Optional JSON file persisting the randomness reference distributions.
+        approximate (bool): Estimate the heavy Levenshtein metrics instead of computing them.
+        time_budget (float): Optional per-input budget in seconds beyond which heavy metrics are estimated.
+
+    Yields:
+        Dict[str, object]: The result for each string.
+    """
+    batches = _batched(enumerate(strings, start=1), batch_size)
+    task = partial(score_records, weights=weights, max_length_multiplier=max_length_multiplier,
+                   cipher_name=cipher_name, timing_trials=timing_trials, cache_path=cache_path,
+                   seed=seed, reference_path=reference_path, approximate=approximate, time_budget=time_budget)
+    if workers == 1:
+        for batch in batches:
+            yield from task(batch)
+        return
+
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for batch in batches:
+            pending.add(executor.submit(task, batch))
+            if len(pending) >= workers * 4:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        for future in as_completed(pending):
+            yield from future.result()
+
+
+def read_corpus(path: str, field: str = "text") -> Iterator[str]:
+    """
+    Reads a corpus file lazily. Files ending in .jsonl hold one JSON string or object
+    per line; anything else holds one record per line.
+
+    Parameters:
+        path (str): The corpus file.
+        field (str): The key holding the string when JSONL records are objects.
+
+    Yields:
+        str: The next record.
+    """
+    jsonl = path.endswith(".jsonl")
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            line = line.rstrip("\n")
+            if not line:
+                continue
+            if jsonl:
+                record = json.loads(line)
+                yield record[field] if isinstance(record, dict) else str(record)
+            else:
+                yield line
+
+
+def load_weights(path: str = None) -> Dict[str, float]:
+    """
+    Loads the metric weights, starting from DEFAULT_WEIGHTS.
+
+    Parameters:
+        path (str): Optional JSON file mapping metric names to weights.
+
+    Returns:
+        Dict[str, float]: The weights for every metric.
+    """
+    weights = dict(DEFAULT_WEIGHTS)
+    if path:
+        with open(path) as file:
+            overrides = json.load(file)
+        unknown = set(overrides) - set(Scoring.METRIC_NAMES)
+        if unknown:
+            raise ValueError(f"Unknown metrics in weights file: {', '.join(sorted(unknown))}")
+        weights.update(overrides)
+    return weights
+
+
+def open_result_writer(path: str, stack: ExitStack) -> Callable[[Dict[str, object]], None]:
+    """
+    Opens a CSV or JSONL result file (chosen by the extension) for streaming writes.
+
+    Parameters:
+        path (str): The output file.
+        stack (ExitStack): The exit stack that closes the file.
+
+    Returns:
+        Callable[[Dict[str, object]], None]: A function that writes one result.
+    """
+    file = stack.enter_context(open(path, "w", encoding="utf-8", newline=""))
+    if path.endswith(".csv"):
+        import csv
+
+        writer = csv.DictWriter(file, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        return writer.writerow
+    return lambda result: file.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+
+def main(argv: List[str] = None) -> None:
+    """
+    The main function that scores a corpus of strings with the Cipher and Scoring classes.
+    Without a corpus file, the built-in SAMPLE_STRINGS are scored.
+
+    Parameters:
+        argv (List[str]): The command-line arguments. Defaults to sys.argv[1:].
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Encrypt, decrypt and score a corpus of strings.")
+    parser.add_argument("corpus", nargs="?", help="corpus file: one record per line, or .jsonl")
+    parser.add_argument("--field", default="text", help="key of the string in JSONL object records")
+    parser.add_argument("--weights", help="JSON file with metric weights (overrides the defaults)")
+    parser.add_argument("--cipher", choices=sorted(CIPHER_CLASSES), default="Cipher", help="cipher class to score")
+    parser.add_argument("--max-length-multiplier", type=float, default=2.0,
+                        help="maximum allowed ratio of encrypted to original length")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--batch-size", type=int, default=64, help="strings per worker task")
+    parser.add_argument("--timing-trials", type=int, default=5, help="timed encryptions per string")
+    parser.add_argument("--output", help="stream results to this .csv or .jsonl file")
+    parser.add_argument("--cache", help="SQLite file caching metric values across runs")
+    parser.add_argument("--seed", type=int, help="seed the randomness for reproducible results")
+    parser.add_argument("--reference", help="JSON file keeping the randomness reference distributions across runs")
+    parser.add_argument("--approximate", action="store_true",
+                        help="estimate the Levenshtein metrics from sampled windows")
+    parser.add_argument("--time-budget", type=float,
+                        help="per-input seconds after which the Levenshtein metrics are estimated")
+    parser.add_argument("--table-rows", type=int, default=20, help="rows shown in the summary table")
+    parser.add_argument("--column-width", type=int, default=40, help="maximum width of table string columns")
+    args = parser.parse_args(argv)
+
+    # Ensure the maximum length multiplier is a positive number
+    assert args.max_length_multiplier > 0, "Maximum length multiplier must be a positive number"
+    # A broken T-table would still round-trip, so check the known answers before scoring with it
+    if args.cipher == "AESCipher" and not AESCipher.self_test():
+        parser.error("AESCipher fails the FIPS-197 test vectors")
+
+    strings = read_corpus(args.corpus, args.field) if args.corpus else SAMPLE_STRINGS
+    weights = load_weights(args.weights)
+
+    print("\n********** Cipher Testing **********")
+    scores = []
+    table_data = []
+    with ExitStack() as stack:
+        write = open_result_writer(args.output, stack) if args.output else None
+        results = score_corpus(strings, weights, args.max_length_multiplier, args.cipher,
+                               args.workers, args.batch_size, args.timing_trials, args.cache, args.seed,
+                               args.reference, args.approximate, args.time_budget)
+        for result in results:
+            if write is not None:
+                write(result)
+            scores.append(result["score"])
+            # Keep the table_rows lowest record numbers; results arrive out of order
+            row = [result[field] for field in RESULT_FIELDS[:7]]
+            if len(table_data) < args.table_rows:
+                heapq.heappush(table_data, (-row[0], row))
+            elif table_data and -table_data[0][0] > row[0]:
+                heapq.heapreplace(table_data, (-row[0], row))
+
+    table_data = sorted((row for _, row in table_data), key=lambda row: row[0])
+    Scoring.print_results(table_data, scores, max_width=args.column_width)
+    if len(scores) > len(table_data):
+        print(f"({len(table_data)} of {len(scores)} results shown)")
+    if args.cache:
+        stats = open_score_cache(args.cache).stats()
+        print(f"Score cache: {stats['entries']} entries" +
+              (f", {stats['hits']} hits, {stats['misses']} misses" if args.workers == 1 else ""))
+    print("\n********** Testing Complete **********\n")
+
+if __name__ == "__main__":
+
+    main()
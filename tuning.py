@@ -0,0 +1,245 @@
+import itertools
+import json
+import sys
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from testing import DEFAULT_WEIGHTS, Scoring, read_corpus, score_corpus
+
+# Upper bound on rows * candidates materialized at once when a custom objective is used
+_BLOCK_ELEMENTS = 1 << 24
+
+
+def weights_to_vector(weights: Dict[str, float]) -> np.ndarray:
+    """
+    Converts a weights dictionary to a vector in Scoring.METRIC_NAMES order.
+
+    Parameters:
+        weights (Dict[str, float]): A dictionary containing the weights for each metric.
+
+    Returns:
+        np.ndarray: The weights as a float vector.
+    """
+    return np.array([weights[name] for name in Scoring.METRIC_NAMES], dtype=float)
+
+
+def vector_to_weights(vector: np.ndarray) -> Dict[str, float]:
+    """
+    Converts a weight vector in Scoring.METRIC_NAMES order back to a dictionary.
+
+    Parameters:
+        vector (np.ndarray): The weights.
+
+    Returns:
+        Dict[str, float]: A dictionary containing the weights for each metric.
+    """
+    return {name: float(value) for name, value in zip(Scoring.METRIC_NAMES, vector)}
+
+
+class MetricMatrix:
+    """
+    The MetricMatrix class holds the metric values of a scored corpus, one row per
+    input and one column per metric in Scoring.METRIC_NAMES order. Scores under any
+    weights are then a matrix product, so trying new weights never re-runs a metric.
+
+    Attributes:
+        values (np.ndarray): The (inputs, metrics) matrix of metric values.
+        qualified (np.ndarray): False for inputs whose ciphertext exceeds the length
+                                limit; Scoring gives those a score of 0.
+    """
+
+    def __init__(self, values: np.ndarray, qualified: np.ndarray) -> None:
+        """
+        The constructor for the MetricMatrix class.
+
+        Parameters:
+            values (np.ndarray): The (inputs, metrics) matrix of metric values.
+            qualified (np.ndarray): One boolean per input.
+        """
+        self.values = np.asarray(values, dtype=float)
+        self.qualified = np.asarray(qualified, dtype=bool)
+
+    @classmethod
+    def from_results(cls, results: Iterable[Dict[str, object]], max_length_multiplier: float) -> 'MetricMatrix':
+        """
+        Builds the matrix from score_corpus() results, in record order.
+
+        Parameters:
+            results (Iterable[Dict[str, object]]): The results, with the *_metric keys.
+            max_length_multiplier (float): The limit the results were scored with.
+
+        Returns:
+            MetricMatrix: The metric matrix.
+        """
+        rows = sorted(results, key=lambda result: result["index"])
+        values = [[result[f"{name}_metric"] for name in Scoring.METRIC_NAMES] for result in rows]
+        qualified = [len(result["encrypted_string"]) <= len(result["original_string"]) * max_length_multiplier
+                     for result in rows]
+        return cls(np.array(values, dtype=float).reshape(len(rows), len(Scoring.METRIC_NAMES)), qualified)
+
+    @classmethod
+    def from_corpus(cls, strings: Iterable[str], max_length_multiplier: float = 2.0, cipher_name: str = "Cipher",
+                    workers: int = 1, batch_size: int = 64, timing_trials: int = 5) -> 'MetricMatrix':
+        """
+        Scores a corpus once with score_corpus() and keeps every metric value.
+
+        Parameters:
+            strings (Iterable[str]): The strings to score.
+            max_length_multiplier (float): The maximum allowed ratio of the length of the encrypted string
+                                           to the length of the original string.
+            cipher_name (str): The cipher class to use, a key of CIPHER_CLASSES.
+            workers (int): The number of worker processes.
+            batch_size (int): The number of strings per task.
+            timing_trials (int): The number of timed encryptions for each running time.
+
+        Returns:
+            MetricMatrix: The metric matrix.
+        """
+        results = score_corpus(strings, DEFAULT_WEIGHTS, max_length_multiplier, cipher_name, workers,
+                               batch_size, timing_trials)
+        return cls.from_results(results, max_length_multiplier)
+
+    def save(self, path: str) -> None:
+        """
+        Writes the matrix to a .npz file.
+
+        Parameters:
+            path (str): The file to write.
+        """
+        np.savez_compressed(path, values=self.values, qualified=self.qualified,
+                            metric_names=np.array(Scoring.METRIC_NAMES))
+
+    @classmethod
+    def load(cls, path: str) -> 'MetricMatrix':
+        """
+        Reads a matrix written by save().
+
+        Parameters:
+            path (str): The .npz file.
+
+        Returns:
+            MetricMatrix: The metric matrix.
+        """
+        with np.load(path) as data:
+            if tuple(data["metric_names"]) != Scoring.METRIC_NAMES:
+                raise ValueError("The saved matrix was built with a different set of metrics")
+            return cls(data["values"], data["qualified"])
+
+    def score(self, weights: Dict[str, float]) -> np.ndarray:
+        """
+        Calculates the score of every input under one set of weights.
+
+        Parameters:
+            weights (Dict[str, float]): A dictionary containing the weights for each metric.
+
+        Returns:
+            np.ndarray: One score per input, matching Scoring.calculate_score().
+        """
+        return (self.values @ weights_to_vector(weights)) * self.qualified
+
+    def score_many(self, weight_matrix: np.ndarray) -> np.ndarray:
+        """
+        Calculates the scores under many weight sets at once.
+
+        Parameters:
+            weight_matrix (np.ndarray): A (candidates, metrics) matrix of weight vectors.
+
+        Returns:
+            np.ndarray: An (inputs, candidates) matrix of scores.
+        """
+        return (self.values @ np.asarray(weight_matrix, dtype=float).T) * self.qualified[:, None]
+
+
+def grid(options: Dict[str, List[float]], base: Dict[str, float] = None) -> np.ndarray:
+    """
+    Builds every combination of the given weight values; the other metrics keep
+    their base weight.
+
+    Parameters:
+        options (Dict[str, List[float]]): The values to try for each metric.
+        base (Dict[str, float]): The weights of the metrics not in options. Defaults to DEFAULT_WEIGHTS.
+
+    Returns:
+        np.ndarray: A (candidates, metrics) matrix of weight vectors.
+    """
+    unknown = set(options) - set(Scoring.METRIC_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown metrics in grid: {', '.join(sorted(unknown))}")
+    base_vector = weights_to_vector(base or DEFAULT_WEIGHTS)
+    names = list(options)
+    columns = [Scoring.METRIC_NAMES.index(name) for name in names]
+    combos = np.array(list(itertools.product(*(options[name] for name in names))), dtype=float)
+    candidates = np.tile(base_vector, (len(combos), 1))
+    candidates[:, columns] = combos.reshape(len(combos), len(columns))
+    return candidates
+
+
+def sweep(matrix: MetricMatrix, candidates: np.ndarray, objective: Callable[[np.ndarray], np.ndarray] = None,
+          top: int = 10) -> List[Tuple[float, Dict[str, float]]]:
+    """
+    Ranks weight configurations by how they score the corpus.
+
+    Parameters:
+        matrix (MetricMatrix): The metric values of the corpus.
+        candidates (np.ndarray): A (candidates, metrics) matrix of weight vectors, e.g. from grid().
+        objective (Callable): Maps an (inputs, candidates) score block to one value per candidate.
+                              Defaults to the mean score, which is computed without materializing
+                              the score block.
+        top (int): The number of configurations to return.
+
+    Returns:
+        List[Tuple[float, Dict[str, float]]]: The best objective values and their weights, best first.
+    """
+    candidates = np.atleast_2d(np.asarray(candidates, dtype=float))
+    if objective is None:
+        # The mean of a linear score is the score of the mean metric vector
+        column_means = (matrix.values * matrix.qualified[:, None]).mean(axis=0)
+        values = candidates @ column_means
+    else:
+        block = max(1, _BLOCK_ELEMENTS // max(1, len(matrix.values)))
+        values = np.concatenate([objective(matrix.score_many(candidates[start:start + block]))
+                                 for start in range(0, len(candidates), block)])
+
+    order = np.argsort(-values, kind="stable")[:top]
+    return [(float(values[i]), vector_to_weights(candidates[i])) for i in order]
+
+
+def main(argv: List[str] = None) -> None:
+    """
+    Scores a corpus once and ranks the weight grid from a JSON file.
+
+    Parameters:
+        argv (List[str]): The command-line arguments. Defaults to sys.argv[1:].
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rank metric weight configurations on a corpus.")
+    parser.add_argument("corpus", help="corpus file: one record per line, or .jsonl")
+    parser.add_argument("grid", help="JSON file mapping metric names to lists of weights to try")
+    parser.add_argument("--matrix", help="cache the metric matrix in this .npz file")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--max-length-multiplier", type=float, default=2.0,
+                        help="maximum allowed ratio of encrypted to original length")
+    parser.add_argument("--top", type=int, default=10, help="number of configurations to show")
+    args = parser.parse_args(argv)
+
+    try:
+        matrix = MetricMatrix.load(args.matrix) if args.matrix else None
+    except FileNotFoundError:
+        matrix = None
+    if matrix is None:
+        matrix = MetricMatrix.from_corpus(read_corpus(args.corpus), args.max_length_multiplier,
+                                          workers=args.workers)
+        if args.matrix:
+            matrix.save(args.matrix)
+
+    with open(args.grid) as file:
+        candidates = grid(json.load(file))
+    print(f"Ranking {len(candidates)} weight configurations on {len(matrix.values)} inputs")
+    for rank, (value, weights) in enumerate(sweep(matrix, candidates, top=args.top), start=1):
+        print(f"{rank:>3}. mean score {value:.6f}  {json.dumps(weights)}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])